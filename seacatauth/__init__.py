@@ -51,6 +51,21 @@ asab.Config.add_defaults({
 		"refresh_token_length": "36",
 		"refresh_token_expiration": "3 d",
 		"client_credentials_grant_expiration": "3 m",
+
+		# ID tokens issued during introspection are cached and reused while the session does not change.
+		# A cached token is reused until this fraction of its lifetime has elapsed.
+		# Set to "0" to disable cache.
+		"id_token_cache_lifetime_ratio": "0.5",
+
+		# Maximum number of ID tokens held in the cache
+		"id_token_cache_size": 10000,
+
+		# Clients with the "signed_access_token" attribute receive self-contained JWT access tokens
+		# which are introspected without a database lookup. This is their maximum lifetime.
+		# Deleted sessions are kept in a revocation list for the same period.
+		# The list is shared via the database and other instances load it once a minute,
+		# so a token of a session deleted elsewhere may remain valid for up to a minute.
+		"signed_access_token_expiration": "5 m",
 	},
 
 	"seacatauth:client": {
@@ -62,6 +77,15 @@ asab.Config.add_defaults({
 		# Set to "0" to disable cache.
 		"cache_expiration": "30 s",
 
+		# Maximum number of clients held in the cache
+		"cache_size": 10000,
+
+		# Successful client secret verifications are cached in memory for this period,
+		# so that frequent token requests from confidential clients skip the costly secret hashing.
+		# The cache is cleared when the client or its secret is changed by this instance.
+		# Set to "0" to disable cache.
+		"secret_cache_expiration": "60 s",
+
 		# Default client provider ID.
 		# Client IDs that do not include a provider will be handled by the default provider.
 		# If no provider with this ID is explicitly configured, the application will create a default
@@ -108,6 +132,14 @@ asab.Config.add_defaults({
 		# Specify what attributes are used in locating credentials (if supported by the respective provider)
 		# Attributes may be specified with a ":ignorecase" modifier for case-insensitive searching
 		"ident_fields": "username:ignorecase email:ignorecase",
+
+		# Indicative credentials counts are refreshed in the background at this interval.
+		# Counts that take longer than count_slow_threshold (or fail) double the interval
+		# of their provider, up to count_max_refresh_interval.
+		# Between refreshes, counts are adjusted on credentials creation and deletion.
+		"count_refresh_interval": "60 s",
+		"count_max_refresh_interval": "1 h",
+		"count_slow_threshold": "1 s",
 	},
 
 	"seacatauth:tenant": {
@@ -204,12 +236,64 @@ asab.Config.add_defaults({
 		# Specifies how often session can be touched to indicate their activity
 		"touch_cooldown": "60 s",
 
+		# Session touches are aggregated in memory and written to the database in bulk at this interval.
+		# Storage webhooks are not called for aggregated touches.
+		# Set to "0" to write every touch immediately.
+		"touch_flush_interval": "5 s",
+
 		# Maximum session age, beyond which the session cannot be extended
 		"maximum_age": "7 d",
 
 		# Algorithmic sessions cache data about tenant and resource authorization.
 		# This option sets the validity period of that data.
 		"algo_cache_expiration": "3 m",
+
+		# Maximum number of entries in the algorithmic session authorization cache.
+		# The cache is cleared for the affected credentials whenever their roles or tenants change.
+		"algo_cache_size": 1000,
+
+		# Verified algorithmic session tokens are cached in memory,
+		# so that repeated introspections skip signature verification and session building.
+		# Set to "0" to disable cache.
+		"algo_token_cache_expiration": "60 s",
+
+		# Maximum number of algorithmic session tokens held in the cache
+		"algo_token_cache_size": 10000,
+
+		# Sessions are cached in memory to speed up the introspection of frequently used sessions.
+		# This option sets the validity period of the cached data.
+		# Keep it short in multi-instance deployments, since other instances are not notified of session changes.
+		# Set to "0" to disable cache.
+		"cache_expiration": "10 s",
+
+		# Maximum number of sessions held in the cache
+		"cache_size": 10000,
+
+		# Expired sessions are purged in batches of this size
+		"purge_batch_size": 1000,
+
+		# Maximum time spent purging expired sessions at once.
+		# Unfinished purge is resumed one minute later.
+		"purge_time_budget": "30 s",
+
+		# Sessions of a user or a tenant are revoked in batches of this size.
+		# Every batch is announced with a single "Session.deleted!" message.
+		"revocation_batch_size": 1000,
+
+		# Session revocations requested via the admin API that match more sessions than this
+		# run in the background. The response then contains a job ID for checking the progress.
+		"revocation_background_threshold": 10000,
+	},
+
+	"seacatauth:role": {
+		# Role definitions are cached in memory to speed up authorization building.
+		# The cache is cleared whenever a role or resource is changed. Other instances are notified
+		# via a shared version counter in the database, which they check once a second.
+		# Set to "0" to disable cache.
+		"cache_expiration": "60 s",
+
+		# Maximum number of roles held in the cache
+		"cache_size": 10000,
 	},
 
 	"seacatauth:password": {
@@ -225,9 +309,25 @@ asab.Config.add_defaults({
 		"password_reset_expiration": "3 d",
 	},
 
+	"seacatauth:hashing": {
+		# Password and client secret hashing runs outside the event loop in an executor pool.
+		# Executor type: "thread" or "process"
+		"executor": "thread",
+
+		# Number of executor workers. Defaults to the number of CPUs if left empty.
+		"max_workers": "",
+
+		# Maximum number of hashing jobs submitted to the executor at once.
+		# Further jobs wait until a slot is available.
+		"queue_size": 64,
+	},
+
 	"seacatauth:batman": {
 		# Key used for generating Basic auth passwords
 		"password_key": "",
+
+		# Authorization changes are collected over this period and synchronized at once
+		"authz_change_debounce": "3 s",
 	},
 
 	"seacatauth:external_login": {
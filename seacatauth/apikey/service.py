@@ -182,13 +182,11 @@ class ApiKeyService(asab.Service):
 			raise exceptions.SessionNotFoundError("Corrupt API key format") from e
 
 		try:
-			token_data = await self.TokenService.get(token_bytes, token_type="apikey")
+			token_data, session = await self.SessionService.get_by_auth_token(token_bytes, token_type="apikey")
 		except KeyError:
 			raise exceptions.SessionNotFoundError("Invalid or expired API key") from None
 
-		try:
-			session = await self.SessionService.get(token_data["sid"])
-		except exceptions.SessionNotFoundError:
+		if session is None:
 			L.error("Integrity error: API key points to a nonexistent session.", struct_data={
 				"sid": token_data["sid"]})
 			await self.TokenService.delete(token_bytes)
@@ -99,7 +99,8 @@ class SeaCatAuthApplication(asab.Application):
 		self.TenantHandler = TenantHandler(self, self.TenantService)
 
 		# Init Credentials services
-		from .credentials import CredentialsService, CredentialsHandler
+		from .credentials import CredentialsService, CredentialsHandler, PasswordHashingService
+		self.PasswordHashingService = PasswordHashingService(self)
 		self.CredentialService = CredentialsService(self, tenant_service=self.TenantService)
 		self.CredentialWebHandler = CredentialsHandler(self, self.CredentialService)
 
@@ -80,6 +80,7 @@ class OTPService(asab.Service):
 		await provider.update(credentials_id, {
 			"__totp": None
 		})
+		self.App.PubSub.publish("TOTP.deactivated!", credentials_id=credentials_id, asynchronously=True)
 
 
 	async def prepare_totp(self, session, credentials_id: str) -> dict:
@@ -131,6 +132,7 @@ class OTPService(asab.Service):
 		upsertor.set("__totp", secret.encode("ascii"), encrypt=True)
 		await upsertor.execute(event_type=EventTypes.TOTP_REGISTERED)
 		L.log(asab.LOG_NOTICE, "TOTP activated.", struct_data={"cid": credentials_id})
+		self.App.PubSub.publish("TOTP.activated!", credentials_id=credentials_id, asynchronously=True)
 
 		await self._delete_prepared_totp_secret(session.SessionId)
 
@@ -11,13 +11,14 @@ from .login_factors import login_factor_builder
 from .login_session import LoginSession
 from .. import exceptions, generic, AuditLogger
 from ..last_activity import EventCode
-from ..authz import build_credentials_authz
+from ..authz import build_credentials_authz, CredentialsAuthzContext
 from ..models import Session
 from ..session import (
 	credentials_session_builder,
 	authz_session_builder,
 	authentication_session_builder,
 	available_factors_session_builder,
+	totp_session_builder,
 )
 
 from ..events import EventTypes
@@ -385,18 +386,23 @@ class AuthenticationService(asab.Service):
 		"""
 		# TODO: Get tenant, scope and other necessary OIDC info from credentials
 		scope = frozenset(["tenant:*", "profile", "email"])
-		authz = await build_credentials_authz(self.TenantService, self.RoleService, credentials_id)
+		authz_context = CredentialsAuthzContext(
+			self.CredentialsService, self.TenantService, self.RoleService, credentials_id)
+		authz = await authz_context.get_authz()
 		has_access_to_all_tenants = self.RBACService.can_access_all_tenants(authz)
 		tenants = await self.TenantService.get_tenants_by_scope(
-			scope, credentials_id, has_access_to_all_tenants)
+			scope, credentials_id, has_access_to_all_tenants, user_tenants=await authz_context.get_tenants())
 
 		session_builders = [
-			await credentials_session_builder(self.CredentialsService, credentials_id, scope),
+			await credentials_session_builder(
+				self.CredentialsService, credentials_id, scope, authz_context=authz_context),
+			await totp_session_builder(self.App.get_service("seacatauth.OTPService"), credentials_id),
 			await authz_session_builder(
 				tenant_service=self.TenantService,
 				role_service=self.RoleService,
 				credentials_id=credentials_id,
 				tenants=tenants,
+				authz_context=authz_context,
 			),
 			authentication_session_builder(login_descriptor),
 			await available_factors_session_builder(self, credentials_id)
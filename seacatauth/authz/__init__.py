@@ -8,7 +8,8 @@ from .rbac.handler import RBACHandler
 from .resource.service import ResourceService
 from .resource.handler import ResourceHandler
 
-from .utils import build_credentials_authz
+from .utils import build_credentials_authz, build_credentials_authz_bulk
+from .context import CredentialsAuthzContext
 
 __all__ = [
 	"RolesHandler",
@@ -19,4 +20,6 @@ __all__ = [
 	"ResourceService",
 	"ResourceHandler",
 	"build_credentials_authz",
+	"build_credentials_authz_bulk",
+	"CredentialsAuthzContext",
 ]
@@ -0,0 +1,63 @@
+import typing
+
+from .utils import build_credentials_authz_bulk
+
+
+class CredentialsAuthzContext:
+	"""
+	Per-request store of the credentials data needed for authorizing and building a session.
+
+	Validation steps and session builders that share the context fetch the credentials, their tenants
+	and their authorization at most once per request.
+	"""
+
+	def __init__(
+		self, credentials_service, tenant_service, role_service, credentials_id: str,
+		credentials: typing.Optional[dict] = None
+	):
+		self.CredentialsService = credentials_service
+		self.TenantService = tenant_service
+		self.RoleService = role_service
+		self.CredentialsId = credentials_id
+		self.Credentials = credentials
+		self.Tenants = None
+		# Maps (tenants, excluded resources) to built authz
+		self.Authz: typing.Dict[typing.Tuple[frozenset, frozenset], dict] = {}
+
+
+	async def get_credentials(self) -> dict:
+		if self.Credentials is None:
+			self.Credentials = await self.CredentialsService.get(self.CredentialsId)
+		return self.Credentials
+
+
+	async def get_tenants(self) -> list:
+		"""
+		Get the list of tenants assigned to the credentials.
+		"""
+		if self.Tenants is None:
+			self.Tenants = await self.TenantService.get_tenants(self.CredentialsId)
+		return self.Tenants
+
+
+	async def get_authz(
+		self, tenants: typing.Iterable = None, exclude_resources: typing.Iterable = None
+	) -> typing.Dict[str, typing.List[str]]:
+		"""
+		Get the authorization of the credentials, see `build_credentials_authz_bulk`.
+
+		Args:
+			tenants: Iterable of tenant IDs to build authz for. If None, only global resources are included.
+			exclude_resources: Iterable of resource IDs to exclude from the result.
+		"""
+		tenants = frozenset(tenants or [])
+		exclude_resources = frozenset(exclude_resources or [])
+		for (built_tenants, built_exclude), authz in self.Authz.items():
+			if built_exclude == exclude_resources and tenants.issubset(built_tenants):
+				# Any previously built authz includes the global resources and those of its tenants
+				return {tenant: authz[tenant] for tenant in ["*", *tenants]}
+
+		authz = await build_credentials_authz_bulk(
+			self.TenantService, self.RoleService, self.CredentialsId, tenants, exclude_resources)
+		self.Authz[(tenants, exclude_resources)] = authz
+		return authz
@@ -276,6 +276,8 @@ class ResourceService(asab.Service):
 				"resource": resource_id,
 			})
 
+		self.App.PubSub.publish("Resource.deleted!", resource_id=resource_id, asynchronously=True)
+
 
 	async def undelete(self, resource_id: str):
 		resource = await self.get(resource_id)
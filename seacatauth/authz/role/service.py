@@ -1,6 +1,11 @@
+import asyncio
+import copy
+import heapq
+import itertools
 import logging
 import re
 import typing
+import pymongo
 import asab.contextvars
 import asab.web.rest
 import asab.web.auth
@@ -15,7 +20,7 @@ from ...events import EventTypes
 from .view import GlobalRoleView, PropagatedRoleView, CustomTenantRoleView
 from .view.abc import RoleView
 from .view.propagated_role import global_role_id_to_propagated
-from ...generic import amerge_sorted, ReverseSortingString
+from ...generic import ReverseSortingString, TTLCache
 
 
 L = logging.getLogger(__name__)
@@ -60,6 +65,7 @@ class RoleService(asab.Service):
 
 	RoleCollection = "r"
 	CredentialsRolesCollection = "cr"
+	CollectionMetadataCollection = "_meta"
 	RoleNamePattern = r"[a-zA-Z_][a-zA-Z0-9_-]{0,31}"
 
 
@@ -87,12 +93,100 @@ class RoleService(asab.Service):
 		self.TenantAdminRole = asab.Config.get(
 			"seacatauth:tenant", "admin_role", fallback="") or None
 
+		# Database request optimization.
+		# Cache maps role IDs to normalized role objects.
+		cache_expiration = asab.Config.getseconds("seacatauth:role", "cache_expiration")
+		if cache_expiration > 0:
+			self.Cache = TTLCache(
+				max_size=asab.Config.getint("seacatauth:role", "cache_size"),
+				expiration=cache_expiration)
+		else:
+			# Disable cache
+			self.Cache = None
+
+		# Role changes are announced to other instances by incrementing a shared cache version,
+		# which every instance checks once a second
+		self.CacheVersion = None
+		self.TaskService = app.get_service("asab.TaskService")
+		if self.Cache is not None:
+			app.PubSub.subscribe("Application.tick!", self._on_tick_sync_cache)
+
+		# Drop the cache also when roles or resources are changed by other components
+		app.PubSub.subscribe("Resource.deleted!", self._on_role_change)
+		app.PubSub.subscribe("Tenant.deleted!", self._on_role_change)
+
+		# Metrics
+		self.MetricsService = app.get_service("asab.MetricsService")
+		self.CacheCounter = self.MetricsService.create_counter(
+			"role_cache",
+			tags={"help": "Counts role cache hits and misses."},
+			init_values={"hit": 0, "miss": 0})
+		self.CacheGauge = self.MetricsService.create_gauge(
+			"role_cache_size",
+			tags={"help": "Counts roles held in the cache."},
+			init_values={"roles": 0})
+		app.PubSub.subscribe("Application.tick/10!", self._on_tick_metric)
+
 
 	async def initialize(self, app):
+		collection = await self.StorageService.collection(self.CredentialsRolesCollection)
+		try:
+			await collection.create_index([("r", pymongo.ASCENDING)])
+		except Exception as e:
+			L.error("Failed to create secondary index (role ID): {}".format(e), struct_data={
+				"collection": self.CredentialsRolesCollection})
+
 		with local_authz(self.Name, resources={ResourceId.SUPERUSER}):
 			await self._ensure_system_roles()
 
 
+	def _on_tick_metric(self, event_name):
+		self.CacheGauge.set("roles", len(self.Cache) if self.Cache is not None else 0)
+
+
+	async def _on_role_change(self, event_name, **kwargs):
+		await self._invalidate_cache()
+
+
+	async def _invalidate_cache(self):
+		"""
+		Drop all cached roles in this and all the other instances.
+		Changing a global role also changes its propagated tenant projections, so the whole cache is dropped.
+		"""
+		if self.Cache is None:
+			return
+		self.Cache.clear()
+		collection = self.StorageService.Database[self.CollectionMetadataCollection]
+		try:
+			metadata = await collection.find_one_and_update(
+				{"_id": self.RoleCollection},
+				{"$inc": {"cache_version": 1}},
+				upsert=True,
+				return_document=pymongo.ReturnDocument.AFTER,
+			)
+		except Exception as e:
+			# Other instances drop the changed roles when they expire
+			L.error("Failed to announce role cache invalidation: {}".format(e))
+			return
+		self.CacheVersion = metadata["cache_version"]
+
+
+	def _on_tick_sync_cache(self, event_name):
+		self.TaskService.schedule(self._sync_cache())
+
+
+	async def _sync_cache(self):
+		"""
+		Drop all cached roles if any instance has changed roles since the last check.
+		"""
+		collection = self.StorageService.Database[self.CollectionMetadataCollection]
+		metadata = await collection.find_one({"_id": self.RoleCollection}, projection={"cache_version": 1})
+		cache_version = metadata.get("cache_version") if metadata is not None else None
+		if cache_version != self.CacheVersion:
+			self.Cache.clear()
+			self.CacheVersion = cache_version
+
+
 	async def _ensure_preset_role(self, role_id: str, properties: dict, update: bool = True):
 		try:
 			existing_role = await self.get(role_id)
@@ -102,6 +196,7 @@ class RoleService(asab.Service):
 			for k, v in properties.items():
 				upsertor.set(k, v)
 			await upsertor.execute()
+			await self._invalidate_cache()
 			L.log(asab.LOG_NOTICE, "Role created.", struct_data={"role_id": role_id})
 			return
 
@@ -125,6 +220,7 @@ class RoleService(asab.Service):
 		for k, v in properties.items():
 			upsertor.set(k, v)
 		await upsertor.execute()
+		await self._invalidate_cache()
 		L.log(asab.LOG_NOTICE, "Role updated.", struct_data={"role_id": role_id})
 
 
@@ -253,27 +349,18 @@ class RoleService(asab.Service):
 			cred_roles = None
 
 		views = self._prepare_views(tenant_id, exclude_global, exclude_propagated)
-		counts = [
-			await view.count(
-				id_substring=name_filter,
-				description_substring=description_filter,
-				resource_filter=resource_filter,
-				flag_tenants=editable_tenants,
-				tenant_flag_filter=assignable_filter,
-				flag_ids=cred_roles,
-				id_flag_filter=assigned_filter,
-			)
-			for view in views
-		]
-
 		offset = (page or 0) * (limit or 0)
-		iterators = []
-		for count, view in zip(counts, views):
-			if count == 0:
-				# Skip empty views to optimize iteration
-				continue
+		if len(views) == 1:
+			# Single view can be paginated directly
+			view_offset, view_limit = offset, limit
+		else:
+			# Any role on the requested page is among the first offset+limit roles of its view
+			view_offset, view_limit = 0, (offset + limit if limit is not None else None)
 
-			iterators.append(view.iterate(
+		results = await asyncio.gather(*(
+			view.search(
+				offset=view_offset,
+				limit=view_limit,
 				sort=sort,
 				id_substring=name_filter,
 				description_substring=description_filter,
@@ -286,37 +373,62 @@ class RoleService(asab.Service):
 					"assigned": "$_id_flag",
 					"editable": "$_tenant_flag",
 				}}
-			))
-
-		roles = []
-		async for role in amerge_sorted(
-			*iterators,
-			key=lambda r: _sorting_key(r, sort),
-			offset=offset,
-			limit=limit,
-		):
-			roles.append(role)
-
-		result = {
-			"count": sum(counts),
+			)
+			for view in views
+		))
+
+		if len(views) == 1:
+			roles = results[0]["data"]
+		else:
+			merged = heapq.merge(*(result["data"] for result in results), key=lambda r: _sorting_key(r, sort))
+			roles = list(itertools.islice(merged, offset, offset + limit if limit is not None else None))
+
+		return {
+			"count": sum(result["count"] for result in results),
 			"data": roles,
 		}
 
-		return result
+
+	def _get_view(self, role_id: str) -> RoleView:
+		tenant_id, role_name = self.parse_role_id(role_id)
+		if not tenant_id:
+			return GlobalRoleView(self.StorageService, self.RoleCollection)
+		elif role_name.startswith("~"):
+			return PropagatedRoleView(self.StorageService, self.RoleCollection, tenant_id)
+		else:
+			return CustomTenantRoleView(self.StorageService, self.RoleCollection, tenant_id)
 
 
 	async def _get(self, role_id: str):
-		tenant_id, role_name = self.parse_role_id(role_id)
+		role = self._get_from_cache(role_id)
+		if role is not None:
+			return copy.deepcopy(role)
+
 		try:
-			if not tenant_id:
-				return await GlobalRoleView(self.StorageService, self.RoleCollection).get(role_id)
-			elif role_name.startswith("~"):
-				return await PropagatedRoleView(self.StorageService, self.RoleCollection, tenant_id).get(role_id)
-			else:
-				return await CustomTenantRoleView(self.StorageService, self.RoleCollection, tenant_id).get(role_id)
+			role = await self._get_view(role_id).get(role_id)
 		except KeyError:
 			raise exceptions.RoleNotFoundError(role_id)
 
+		self._store_in_cache(role_id, role)
+		return role
+
+
+	def _get_from_cache(self, role_id: str) -> typing.Optional[dict]:
+		if self.Cache is None:
+			return None
+		role = self.Cache.get(role_id)
+		if role is None:
+			self.CacheCounter.add("miss", 1)
+		else:
+			self.CacheCounter.add("hit", 1)
+		return role
+
+
+	def _store_in_cache(self, role_id: str, role: dict):
+		if self.Cache is not None:
+			# Store a copy, the returned object may be modified by the caller
+			self.Cache.set(role_id, copy.deepcopy(role))
+
 
 	async def get(self, role_id: str):
 		tenant_id, _ = self.parse_role_id(role_id)
@@ -331,6 +443,45 @@ class RoleService(asab.Service):
 		return role_obj["resources"]
 
 
+	async def get_resources_by_roles(self, role_ids: typing.Iterable[str]) -> typing.Dict[str, typing.List[str]]:
+		"""
+		Fetch resources of multiple roles in a single database query.
+		Propagated tenant roles are resolved to their global source role.
+
+		Args:
+			role_ids: Iterable of role IDs.
+
+		Returns:
+			A dictionary mapping role IDs to lists of their resources. Roles that do not exist are omitted.
+		"""
+		result = {}
+
+		# Map database IDs to requested role IDs (one global role may be requested via multiple tenants)
+		db_ids = {}
+		for role_id in role_ids:
+			role = self._get_from_cache(role_id)
+			if role is not None:
+				result[role_id] = list(role.get("resources", []))
+				continue
+			tenant_id, role_name = self.parse_role_id(role_id)
+			if tenant_id and role_name.startswith("~"):
+				db_id = "*/{}".format(role_name[1:])
+			else:
+				db_id = role_id
+			db_ids.setdefault(db_id, []).append(role_id)
+
+		if len(db_ids) == 0:
+			return result
+
+		collection = self.StorageService.Database[self.RoleCollection]
+		async for role_db in collection.find({"_id": {"$in": list(db_ids)}}):
+			for role_id in db_ids[role_db["_id"]]:
+				role = self._get_view(role_id)._normalize_role(copy.deepcopy(role_db))
+				self._store_in_cache(role_id, role)
+				result[role_id] = role.get("resources", [])
+		return result
+
+
 	async def create(
 		self,
 		role_id: str,
@@ -393,6 +544,7 @@ class RoleService(asab.Service):
 			upsertor.set("managed_by", "seacat-auth")
 
 		role_id = await upsertor.execute(event_type=EventTypes.ROLE_CREATED)
+		await self._invalidate_cache()
 		L.log(asab.LOG_NOTICE, "Role created", struct_data={"role_id": role_id})
 
 		self.App.PubSub.publish("Role.created!", role_id=role_id, asynchronously=True)
@@ -436,6 +588,7 @@ class RoleService(asab.Service):
 
 		# Delete the role
 		await self.StorageService.delete(self.RoleCollection, role_id)
+		await self._invalidate_cache()
 		L.log(asab.LOG_NOTICE, "Role deleted", struct_data={"role_id": role_id})
 		self.App.PubSub.publish("Role.deleted!", role_id=role_id, asynchronously=True)
 		return "OK"
@@ -506,6 +659,7 @@ class RoleService(asab.Service):
 			upsertor.set("description", description)
 
 		await upsertor.execute(event_type=EventTypes.ROLE_UPDATED)
+		await self._invalidate_cache()
 		L.log(asab.LOG_NOTICE, "Role updated", struct_data={"role_id": role_id})
 		self.App.PubSub.publish("Role.updated!", role_id=role_id, asynchronously=True)
 
@@ -630,7 +784,10 @@ class RoleService(asab.Service):
 		Yields:
 			Credentials IDs assigned the role
 		"""
-		query_filter = {"r": role_id}
+		if isinstance(role_id, str):
+			query_filter = {"r": role_id}
+		else:
+			query_filter = {"r": {"$in": list(role_id)}}
 		collection = self.StorageService.Database[self.CredentialsRolesCollection]
 		cursor = collection.find(query_filter)
 		cursor.sort("_id", 1)
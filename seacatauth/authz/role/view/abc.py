@@ -110,6 +110,81 @@ class RoleView(abc.ABC):
 			yield self._normalize_role(role)
 
 
+	async def search(
+		self,
+		offset: int = 0,
+		limit: int | None = None,
+		sort: list[tuple[str, int]] | None = None,
+		id_substring: str | None = None,
+		description_substring: str | None = None,
+		resource_filter: str | None = None,
+		flag_tenants: typing.Iterable[str] | None = None,
+		tenant_flag_filter: bool | None = None,
+		flag_ids: typing.Iterable[str] | None = None,
+		id_flag_filter: bool | None = None,
+		set_fields: dict | None = None,
+	) -> dict:
+		"""
+		List roles matching the given criteria and count all matching roles in a single query.
+
+		Args:
+			offset: Number of matching roles to skip.
+			limit: Maximum number of matching roles to return.
+			sort: If given, sort results by the given field and direction.
+			id_substring: If given, return only roles whose ID contains this substring.
+			description_substring: If given, return only roles whose description contains this substring.
+			resource_filter: If given, return only roles with the given resource.
+			flag_tenants: If given, add a boolean field "_tenant_flag" indicating whether the role matches any of the given tenants.
+			tenant_flag_filter: If given, filter results by the value of the "_tenant_flag" field.
+			flag_ids: If given, add a boolean field "_id_flag" indicating whether the role ID is in the given list.
+			id_flag_filter: If given, filter results by the value of the "_id_flag" field.
+			set_fields: If given, set the given fields in the final stage.
+
+		Returns:
+			A dict with "count" of all matching roles and "data" with the requested roles.
+		"""
+		filters = {
+			"id_substring": id_substring,
+			"description_substring": description_substring,
+			"resource_filter": resource_filter,
+			"flag_tenants": flag_tenants,
+			"tenant_flag_filter": tenant_flag_filter,
+			"flag_ids": flag_ids,
+			"id_flag_filter": id_flag_filter,
+		}
+		if limit is None:
+			# Unbounded results may not fit into the single document produced by $facet, stream them instead
+			return {
+				"count": await self.count(**filters),
+				"data": [
+					role async for role in self.iterate(offset=offset, sort=sort, set_fields=set_fields, **filters)
+				],
+			}
+
+		pipeline = self._aggregation_pipeline(set_fields=set_fields, **filters)
+		if pipeline is None:
+			return {"count": 0, "data": []}
+
+		data_pipeline = []
+		if sort:
+			data_pipeline.append({"$sort": {k: v for k, v in sort}})
+		data_pipeline.append({"$skip": offset})
+		data_pipeline.append({"$limit": limit})
+
+		pipeline.append({"$facet": {
+			"count": [{"$count": "count"}],
+			"data": data_pipeline,
+		}})
+		result = await self.StorageService.Database[self.CollectionName].aggregate(pipeline).to_list(length=1)
+		if not result or not result[0]["count"]:
+			return {"count": 0, "data": []}
+
+		return {
+			"count": result[0]["count"][0]["count"],
+			"data": [self._normalize_role(role) for role in result[0]["data"]],
+		}
+
+
 	def _aggregation_pipeline(
 		self,
 		offset: int | None = None,
@@ -0,0 +1,119 @@
+import asyncio
+import logging
+import typing
+import asab
+
+
+L = logging.getLogger(__name__)
+
+
+class AuthzChangeQueue:
+	"""
+	Collects authorization change events over a short window and publishes them as a single
+	`Batman.authz_changed!` event with a deduplicated set of affected credentials IDs.
+
+	Role updates are expanded to the credentials that have the role assigned.
+	Subscribers receive `credentials_ids=None` when all credentials need to be synchronized.
+	"""
+
+	def __init__(self, batman_svc):
+		self.App = batman_svc.App
+		self.RoleService = self.App.get_service("seacatauth.RoleService")
+		self.TenantService = self.App.get_service("seacatauth.TenantService")
+		self.DebounceWindow = asab.Config.getseconds("seacatauth:batman", "authz_change_debounce")
+
+		self.PendingCredentials: typing.Set[str] = set()
+		self.PendingRoles: typing.Set[str] = set()
+		self.PendingAll = False
+		self.FlushScheduled = False
+
+		self.App.PubSub.subscribe("Role.assigned!", self._on_credentials_change)
+		self.App.PubSub.subscribe("Role.unassigned!", self._on_credentials_change)
+		self.App.PubSub.subscribe("Tenant.assigned!", self._on_credentials_change)
+		self.App.PubSub.subscribe("Tenant.unassigned!", self._on_credentials_change)
+		self.App.PubSub.subscribe("Credentials.updated!", self._on_credentials_change)
+		self.App.PubSub.subscribe("Role.updated!", self._on_role_change)
+
+
+	def _on_credentials_change(self, event_name, credentials_id=None, **kwargs):
+		if credentials_id:
+			self.PendingCredentials.add(credentials_id)
+		else:
+			self.PendingAll = True
+		self._schedule_flush()
+
+
+	def _on_role_change(self, event_name, role_id=None, **kwargs):
+		if role_id:
+			self.PendingRoles.add(role_id)
+		else:
+			self.PendingAll = True
+		self._schedule_flush()
+
+
+	def _schedule_flush(self):
+		if self.FlushScheduled:
+			return
+		self.FlushScheduled = True
+		self.App.TaskService.schedule(self._flush_later())
+
+
+	async def _flush_later(self):
+		await asyncio.sleep(self.DebounceWindow)
+		self.FlushScheduled = False
+		await self.flush()
+
+
+	async def flush(self):
+		"""
+		Publish the collected changes and reset the queue.
+		"""
+		credentials_ids = self.PendingCredentials
+		role_ids = self.PendingRoles
+		sync_all = self.PendingAll
+		self.PendingCredentials = set()
+		self.PendingRoles = set()
+		self.PendingAll = False
+
+		if sync_all:
+			self.App.PubSub.publish("Batman.authz_changed!", credentials_ids=None)
+			return
+
+		try:
+			for role_id in role_ids:
+				credentials_ids.update(await self._get_role_credentials(role_id))
+		except Exception as e:
+			# Put the changes back and try again later
+			L.error("Failed to resolve role assignments: {}".format(e), struct_data={"count": len(role_ids)})
+			self.PendingCredentials.update(credentials_ids)
+			self.PendingRoles.update(role_ids)
+			self._schedule_flush()
+			return
+
+		if len(credentials_ids) == 0:
+			return
+
+		L.debug("Authorization changed.", struct_data={"count": len(credentials_ids)})
+		self.App.PubSub.publish("Batman.authz_changed!", credentials_ids=frozenset(credentials_ids))
+
+
+	async def _get_role_credentials(self, role_id: str) -> typing.Set[str]:
+		"""
+		Get IDs of all credentials that have the role assigned, including its propagated tenant variants.
+		"""
+		credentials_ids = set()
+		async for assignment in self.RoleService.iterate_role_assignments(role_id):
+			credentials_ids.add(assignment["c"])
+
+		tenant_id, role_name = self.RoleService.parse_role_id(role_id)
+		if tenant_id is None:
+			# Global roles may be propagated and assigned within tenants
+			propagated_role_ids = [
+				"{}/~{}".format(tenant, role_name)
+				for tenant in await self.TenantService.list_tenant_ids()
+			]
+			if len(propagated_role_ids) > 0:
+				async for assignment in self.RoleService.iterate_role_assignments(propagated_role_ids):
+					credentials_ids.add(assignment["c"])
+
+		return credentials_ids
@@ -1,7 +1,10 @@
 import asyncio
 import contextlib
 import datetime
+import hashlib
+import json
 import re
+import time
 import ssl
 import logging
 import typing
@@ -14,7 +17,7 @@ import asab.tls
 
 from .. import exceptions
 from ..models.const import ResourceId
-from ..authz import build_credentials_authz
+from ..authz import build_credentials_authz_bulk
 from . import utils
 
 
@@ -51,7 +54,10 @@ class ElasticSearchIntegration(asab.config.Configurable):
 		# IDs of Elasticsearch resources
 		"elasticsearch_superuser_resource_id": ResourceId.SUPERUSER,  # Superuser access to the entire Elasticsearch cluster
 
-		"elasticsearch_monitoring_resource_id": "elasticsearch:monitoring"
+		"elasticsearch_monitoring_resource_id": "elasticsearch:monitoring",
+
+		# Number of credentials synchronized concurrently
+		"sync_workers": 8,
 	}
 
 
@@ -107,16 +113,30 @@ class ElasticSearchIntegration(asab.config.Configurable):
 
 		self.RetrySyncAll: datetime.datetime | None = None
 
+		self.SyncWorkers = int(self.Config.get("sync_workers"))
+		if self.SyncWorkers <= 0:
+			raise ValueError("ElasticSearch sync_workers must be a positive integer.")
+
+		# Maps credentials IDs to the hash of the user document last successfully sent to ElasticSearch
+		# Unchanged users are not sent again, except in full sync, which repairs users changed in ElasticSearch
+		self.UserHashes: typing.Dict[str, str] = {}
+
+		self.MetricsService = self.App.get_service("asab.MetricsService")
+		self.SyncCounter = self.MetricsService.create_counter(
+			"elasticsearch_user_sync",
+			tags={"help": "Counts ElasticSearch user synchronizations by result."},
+			init_values={"updated": 0, "unchanged": 0, "failed": 0})
+		self.FullSyncGauge = self.MetricsService.create_gauge(
+			"elasticsearch_credentials_sync",
+			tags={"help": "Progress and throughput of the current or last credentials synchronization."},
+			init_values={"processed": 0, "duration": 0, "per_second": 0})
+
 		self.App.PubSub.subscribe("Batman.initialized!", self._on_init)
-		self.App.PubSub.subscribe("Role.assigned!", self._on_authz_change)
-		self.App.PubSub.subscribe("Role.unassigned!", self._on_authz_change)
-		self.App.PubSub.subscribe("Role.updated!", self._on_authz_change)
-		self.App.PubSub.subscribe("Tenant.assigned!", self._on_authz_change)
-		self.App.PubSub.subscribe("Tenant.unassigned!", self._on_authz_change)
+		self.App.PubSub.subscribe("Batman.authz_changed!", self._on_authz_change)
 		self.App.PubSub.subscribe("Tenant.created!", self._on_tenant_created)
 		self.App.PubSub.subscribe("Tenant.updated!", self._on_tenant_updated)
-		self.App.PubSub.subscribe("Credentials.updated!", self._on_authz_change)
 		self.App.PubSub.subscribe("Application.housekeeping!", self._on_housekeeping)
+		self.App.PubSub.subscribe("Credentials.deleted!", self._on_credentials_deleted)
 		self.App.PubSub.subscribe("Application.tick/10!", self._retry_sync)
 
 
@@ -181,6 +201,8 @@ class ElasticSearchIntegration(asab.config.Configurable):
 		Perform full synchronization of all index access roles, Kibana spaces and roles, and credentials.
 		"""
 		self.RetrySyncAll = None
+		# Send all users again, they may have been modified or deleted directly in ElasticSearch
+		self.UserHashes.clear()
 		try:
 			await self._sync_all_index_access_roles()
 		except aiohttp.client_exceptions.ClientConnectionError as e:
@@ -202,32 +224,30 @@ class ElasticSearchIntegration(asab.config.Configurable):
 			return
 
 
-	async def _on_authz_change(self, event_name, credentials_id=None, **kwargs):
-		cred_svc = self.BatmanService.App.get_service("seacatauth.CredentialsService")
-		if not credentials_id:
-			# No specific credentials ID provided, sync all credentials
-			try:
-				await self.sync_all_credentials()
-			except aiohttp.client_exceptions.ClientConnectionError as e:
-				L.error("Cannot connect to ElasticSearch: {}".format(str(e)))
-				self.RetrySyncAll = datetime.datetime.now(datetime.UTC) + datetime.timedelta(seconds=60)
-			return
-
-		# Sync only the specified credentials
-		try:
-			credentials = await cred_svc.get(credentials_id)
-		except exceptions.CredentialsNotFoundError:
-			# The authz update probably happened on deleted credentials
-			return
-
+	async def _on_authz_change(self, event_name, credentials_ids=None):
 		try:
-			await self.sync_credentials(credentials)
+			if credentials_ids is None:
+				# No specific credentials IDs provided, sync all credentials
+				await self.sync_all_credentials()
+			else:
+				await self._sync_many_credentials(self._iterate_credentials(credentials_ids))
 		except aiohttp.client_exceptions.ClientConnectionError as e:
 			L.error("Cannot connect to ElasticSearch: {}".format(str(e)))
 			self.RetrySyncAll = datetime.datetime.now(datetime.UTC) + datetime.timedelta(seconds=60)
-			return
 
 
+	def _on_credentials_deleted(self, event_name, credentials_id):
+		self.UserHashes.pop(credentials_id, None)
+
+
+	async def _iterate_credentials(self, credentials_ids: typing.Iterable[str]):
+		for credentials_id in credentials_ids:
+			try:
+				yield await self.CredentialsService.get(credentials_id)
+			except exceptions.CredentialsNotFoundError:
+				# The authz update probably happened on deleted credentials
+				continue
+
 
 	async def _on_tenant_created(self, event_name, tenant_id):
 		try:
@@ -388,8 +408,46 @@ class ElasticSearchIntegration(asab.config.Configurable):
 		Perform synchronization of all credentials
 		"""
 		# TODO: Remove users that are managed by us but are removed (use `managed_role` to find these)
-		async for cred in self.CredentialsService.iterate():
-			await self.sync_credentials(cred)
+		await self._sync_many_credentials(self.CredentialsService.iterate())
+
+
+	async def _sync_many_credentials(self, credentials: typing.AsyncIterable[dict]):
+		"""
+		Synchronize credentials using a bounded number of concurrent workers
+		"""
+		start = time.monotonic()
+		processed = 0
+		pending = set()
+		try:
+			async for cred in credentials:
+				if len(pending) >= self.SyncWorkers:
+					done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+					for task in done:
+						# Propagate connection errors
+						task.result()
+					processed += len(done)
+					self._update_sync_progress(processed, start)
+				pending.add(asyncio.create_task(self.sync_credentials(cred)))
+
+			if len(pending) > 0:
+				done, pending = await asyncio.wait(pending)
+				for task in done:
+					task.result()
+				processed += len(done)
+		finally:
+			for task in pending:
+				task.cancel()
+			self._update_sync_progress(processed, start)
+
+		L.info("ElasticSearch credentials synchronized.", struct_data={
+			"count": processed, "duration": round(time.monotonic() - start, 3)})
+
+
+	def _update_sync_progress(self, processed: int, start: float):
+		duration = time.monotonic() - start
+		self.FullSyncGauge.set("processed", processed)
+		self.FullSyncGauge.set("duration", duration)
+		self.FullSyncGauge.set("per_second", processed / duration if duration > 0 else 0)
 
 
 	async def sync_credentials(self, cred: dict):
@@ -430,7 +488,7 @@ class ElasticSearchIntegration(asab.config.Configurable):
 
 		# Get full authorization scope
 		assigned_tenants = await self.TenantService.get_tenants(cred["_id"])
-		authz = await build_credentials_authz(
+		authz = await build_credentials_authz_bulk(
 			self.TenantService, self.RoleService, cred["_id"], tenants=assigned_tenants)
 
 		# Tenant membership grants read access to tenant indices
@@ -449,20 +507,29 @@ class ElasticSearchIntegration(asab.config.Configurable):
 		if self.Kibana.is_enabled():
 			elk_roles.update(self.Kibana.get_kibana_roles_by_authz(authz))
 
-		elastic_user["roles"] = list(elk_roles)
+		elastic_user["roles"] = sorted(elk_roles)
+
+		# Skip the request if the user has not changed since the last successful sync
+		user_hash = hashlib.sha256(
+			json.dumps([username, elastic_user], sort_keys=True).encode("utf-8")).hexdigest()
+		if self.UserHashes.get(cred["_id"]) == user_hash:
+			self.SyncCounter.add("unchanged", 1)
+			return
 
+		self.UserHashes.pop(cred["_id"], None)
 		async with self._with_elasticsearch_nodes(
 			lambda session: session.post("_security/user/{}".format(username), json=elastic_user)
 		) as resp:
 			if 200 <= resp.status < 300:
-				# Everything is alright here
-				pass
+				self.UserHashes[cred["_id"]] = user_hash
+				self.SyncCounter.add("updated", 1)
 			else:
 				text = await resp.text()
 				L.warning(
 					"Failed to create/update user in ElasticSearch:\n{}".format(text[:1000]),
 					struct_data={"cid": cred["_id"]}
 				)
+				self.SyncCounter.add("failed", 1)
 
 
 	def _prepare_ignored_usernames(self):
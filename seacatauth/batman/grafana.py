@@ -5,6 +5,7 @@ import aiohttp.client_exceptions
 import asab
 import asab.config
 
+from .. import exceptions
 from ..authz import build_credentials_authz
 
 
@@ -56,19 +57,22 @@ class GrafanaIntegration(asab.config.Configurable):
 		self.LocalUsers = frozenset(lu)
 
 		batman_svc.App.PubSub.subscribe("Application.housekeeping!", self._on_housekeeping)
-		batman_svc.App.PubSub.subscribe("Role.assigned!", self._on_authz_change)
-		batman_svc.App.PubSub.subscribe("Role.unassigned!", self._on_authz_change)
-		batman_svc.App.PubSub.subscribe("Role.updated!", self._on_authz_change)
-		batman_svc.App.PubSub.subscribe("Credentials.updated!", self._on_authz_change)
+		batman_svc.App.PubSub.subscribe("Batman.authz_changed!", self._on_authz_change)
 
 	async def _on_housekeeping(self, event_name):
 		await self.sync_all()
 
-	async def _on_authz_change(self, event_name, credentials_id=None, **kwargs):
-		if credentials_id:
-			await self.sync_credentials(credentials_id)
-		else:
+	async def _on_authz_change(self, event_name, credentials_ids=None):
+		if credentials_ids is None:
 			await self.sync_all()
+			return
+
+		for credentials_id in credentials_ids:
+			try:
+				await self.sync_credentials(credentials_id)
+			except exceptions.CredentialsNotFoundError:
+				# The authz update probably happened on deleted credentials
+				continue
 
 	async def _initialize_resources(self):
 		try:
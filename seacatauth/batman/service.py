@@ -4,6 +4,7 @@ import cryptography.hazmat.primitives.hashes
 import cryptography.hazmat.backends
 import asab
 
+from .change_queue import AuthzChangeQueue
 
 L = logging.getLogger(__name__)
 
@@ -40,6 +41,12 @@ class BatmanService(asab.Service):
 				GrafanaIntegration(self)
 			)
 
+		if len(self.Integrations) > 0:
+			# Shared by all the integrations, which subscribe to the resulting `Batman.authz_changed!` event
+			self.AuthzChangeQueue = AuthzChangeQueue(self)
+		else:
+			self.AuthzChangeQueue = None
+
 		app.TaskService.schedule(*[i.initialize() for i in self.Integrations])
 
 
@@ -83,6 +83,9 @@ class ClientProviderABC(asab.Configurable, abc.ABC):
 			Client session expiration in seconds.
 		- seacatauth_credentials: bool | None
 			Whether to create client credentials for this client and enable access control.
+		- signed_access_token: bool | None
+			Issue short-lived self-contained JWT access tokens that are validated without a database lookup.
+			Ignored for Batman sessions, which always receive opaque access tokens.
 
 	Additional fields may be present depending on the provider implementation and application needs.
 	"""
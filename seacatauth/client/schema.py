@@ -146,6 +146,12 @@ CLIENT_METADATA_SCHEMA = {
 		"type": "boolean",
 		"description": "Whether to create client credentials for this client and enable access control.",
 	},
+	"signed_access_token": {  # NON-CANONICAL
+		"type": "boolean",
+		"description":
+			"Issue short-lived self-contained JWT access tokens that are validated without a database lookup. "
+			"Ignored for Batman sessions, which always receive opaque access tokens.",
+	},
 }
 
 REGISTER_CLIENT = {
@@ -1,6 +1,8 @@
 import base64
 import binascii
 import datetime
+import hashlib
+import hmac
 import logging
 import secrets
 import typing
@@ -53,14 +55,34 @@ class ClientService(asab.Service):
 		if self.ClientSecretExpiration <= 0:
 			self.ClientSecretExpiration = None
 
-		self.Cache: typing.Optional[typing.Dict[str, typing.Tuple[dict, datetime.datetime]]] = None
-		self.CacheExpiration = asab.Config.getseconds("seacatauth:client", "cache_expiration")
-		if self.CacheExpiration <= 0:
+		cache_expiration = asab.Config.getseconds("seacatauth:client", "cache_expiration")
+		if cache_expiration > 0:
+			self.Cache = generic.TTLCache(
+				max_size=asab.Config.getint("seacatauth:client", "cache_size"),
+				expiration=cache_expiration)
+		else:
 			# Disable cache
 			self.Cache = None
+
+		# Token request optimization.
+		# Cache holds successful client secret verifications, keyed by client ID and a keyed HMAC
+		# of the presented secret and the stored hash. The HMAC key lives only in the memory of this process.
+		secret_cache_expiration = asab.Config.getseconds("seacatauth:client", "secret_cache_expiration")
+		if secret_cache_expiration > 0:
+			self.SecretCache = generic.TTLCache(
+				max_size=asab.Config.getint("seacatauth:client", "cache_size"),
+				expiration=secret_cache_expiration)
+			self.SecretCacheKey = secrets.token_bytes(32)
 		else:
-			self.Cache = {}
-			self.CacheExpiration = datetime.timedelta(seconds=self.CacheExpiration)
+			# Disable cache
+			self.SecretCache = None
+			self.SecretCacheKey = None
+
+		self.MetricsService = app.get_service("asab.MetricsService")
+		self.SecretCacheCounter = self.MetricsService.create_counter(
+			"client_secret_cache",
+			tags={"help": "Counts client secret verification cache hits and misses."},
+			init_values={"hit": 0, "miss": 0})
 
 		# DEV OPTIONS
 		# _allow_custom_client_ids
@@ -284,7 +306,8 @@ class ClientService(asab.Service):
 		assert_client_is_editable(client)
 
 		client_secret, client_secret_expires_at = self._generate_client_secret()
-		client_secret_hash = generic.argon2_hash(client_secret)
+		hashing_service = self.App.get_service("seacatauth.PasswordHashingService")
+		client_secret_hash = await hashing_service.argon2_hash(client_secret)
 		update = {
 			"__client_secret": client_secret_hash,
 			"client_secret_updated_at": datetime.datetime.now(datetime.timezone.utc),
@@ -295,6 +318,7 @@ class ClientService(asab.Service):
 		await provider.update_client(internal_client_id, **update)
 		AuditLogger.log(asab.LOG_NOTICE, "Client secret updated.", struct_data={"client_id": client_id})
 		self._delete_from_cache(client_id)
+		self._delete_verified_secrets(client_id)
 
 		return client_secret, client_secret_expires_at
 
@@ -312,6 +336,7 @@ class ClientService(asab.Service):
 		await provider.update_client(internal_client_id, **client_data)
 		L.log(asab.LOG_NOTICE, "Client updated.", struct_data={"client_id": client_id})
 		self._delete_from_cache(client_id)
+		self._delete_verified_secrets(client_id)
 
 
 	async def delete_client(self, client_id: str):
@@ -326,6 +351,7 @@ class ClientService(asab.Service):
 		await provider.delete_client(internal_client_id)
 		L.log(asab.LOG_NOTICE, "Client deleted.", struct_data={"client_id": client_id})
 		self._delete_from_cache(client_id)
+		self._delete_verified_secrets(client_id)
 
 
 	async def validate_client_authorize_options(
@@ -397,13 +423,10 @@ class ClientService(asab.Service):
 			L.error("No client ID in request.")
 			raise exceptions.ClientAuthenticationError("No client ID in request.")
 
-		# Get provider and client data
-		provider_id, internal_client_id = self.parse_client_id(client_id)
-		try:
-			provider = self.ClientProviders[provider_id]
-			client_dict = await provider.get_client(internal_client_id)
-		except KeyError:
-			raise exceptions.ClientNotFoundError(client_id)
+		# Get client data
+		# Always read from the provider: the secret hash must not come from a stale cache,
+		# since the secret may have been rotated or the client deleted by another instance
+		client_dict = await self._get_client_raw(client_id, use_cache=False)
 
 		# Check if used authentication method matches the pre-configured one
 		expected_auth_method = client_dict.get(
@@ -436,13 +459,45 @@ class ClientService(asab.Service):
 		if not client_secret_hash:
 			L.error("Client does not have a secret set.", struct_data={"client_id": client_id})
 			raise exceptions.ClientAuthenticationError("Client does not have a secret set.", client_id=client_id)
-		if not generic.argon2_verify(client_secret_hash, client_secret):
+		if not await self._verify_client_secret(client_id, client_secret_hash, client_secret):
 			L.error("Incorrect client secret.", struct_data={"client_id": client_id})
 			raise exceptions.ClientAuthenticationError("Incorrect client secret.", client_id=client_id)
 
 		return client_dict
 
 
+	async def _verify_client_secret(self, client_id: str, client_secret_hash: str, client_secret: str) -> bool:
+		"""
+		Verify the client secret against its hash outside of the event loop.
+		Successful verifications are cached, so that repeated token requests skip the hashing.
+		"""
+		if self.SecretCache is not None:
+			# The stored hash is part of the key, so a secret changed by another instance is never matched
+			cache_key = (client_id, hmac.new(
+				self.SecretCacheKey,
+				"{}\n{}".format(client_secret_hash, client_secret).encode("utf-8"),
+				hashlib.sha256,
+			).digest())
+			if self.SecretCache.get(cache_key):
+				self.SecretCacheCounter.add("hit", 1)
+				return True
+			self.SecretCacheCounter.add("miss", 1)
+
+		hashing_service = self.App.get_service("seacatauth.PasswordHashingService")
+		if not await hashing_service.verify(client_secret_hash, client_secret):
+			return False
+
+		if self.SecretCache is not None:
+			self.SecretCache.set(cache_key, True)
+		return True
+
+
+	def _delete_verified_secrets(self, client_id: str):
+		if self.SecretCache is None:
+			return
+		self.SecretCache.delete_matching(lambda key, value: key[0] == client_id)
+
+
 	@asab.web.auth.require(ResourceId.CLIENT_APIKEY_MANAGE)
 	async def issue_token(
 		self,
@@ -664,40 +719,26 @@ class ClientService(asab.Service):
 	def _get_from_cache(self, client_id: str):
 		if self.Cache is None:
 			return None
-		if client_id not in self.Cache:
-			return None
-		client, expires_at = self.Cache[client_id]
-		if datetime.datetime.now(datetime.UTC) > expires_at:
-			del self.Cache[client_id]
-			return None
-		return client
+		return self.Cache.get(client_id)
 
 
 	def _store_in_cache(self, client_id, client):
 		if self.Cache is None:
 			return
-		self.Cache[client_id] = (
-			client,
-			datetime.datetime.now(datetime.UTC) + self.CacheExpiration
-		)
+		self.Cache.set(client_id, client)
 
 
 	def _delete_from_cache(self, client_id: str):
 		if self.Cache is None:
 			return
-		if client_id in self.Cache:
-			del self.Cache[client_id]
+		self.Cache.delete(client_id)
 
 
 	def _clear_expired_cache(self, event_name):
-		if not self.Cache:
-			return
-		valid = {}
-		now = datetime.datetime.now(datetime.UTC)
-		for k, (v, exp) in self.Cache.items():
-			if now < exp:
-				valid[k] = v, exp
-		self.Cache = valid
+		if self.Cache is not None:
+			self.Cache.delete_expired()
+		if self.SecretCache is not None:
+			self.SecretCache.delete_expired()
 
 
 	def _normalize_client(self, provider_id: str, raw_client: dict):
@@ -1,7 +1,9 @@
 from .service import CredentialsService
 from .handler import CredentialsHandler
+from .hashing import PasswordHashingService
 
 __all__ = [
 	"CredentialsService",
 	"CredentialsHandler",
+	"PasswordHashingService",
 ]
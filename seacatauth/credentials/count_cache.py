@@ -0,0 +1,114 @@
+import logging
+import time
+import typing
+import asab
+
+
+L = logging.getLogger(__name__)
+
+
+class CredentialsCountCache:
+	"""
+	Holds indicative credentials counts of all providers.
+
+	Counts are refreshed in the background at a configured interval. Providers whose count takes long
+	are refreshed less often: the interval is doubled after every slow or failed count, up to a maximum,
+	and reset after a fast one. Between refreshes, the counts are adjusted from credentials creation
+	and deletion events.
+	"""
+
+	def __init__(self, credentials_svc):
+		self.App = credentials_svc.App
+		self.CredentialsService = credentials_svc
+		self.TaskService = self.App.get_service("asab.TaskService")
+		self.RefreshInterval = asab.Config.getseconds("seacatauth:credentials", "count_refresh_interval")
+		self.MaxRefreshInterval = max(
+			self.RefreshInterval,
+			asab.Config.getseconds("seacatauth:credentials", "count_max_refresh_interval"))
+		self.SlowCountThreshold = asab.Config.getseconds("seacatauth:credentials", "count_slow_threshold")
+
+		# Maps provider IDs to their last known count (None if unknown)
+		self.Counts: typing.Dict[str, typing.Optional[int]] = {}
+		self.Intervals: typing.Dict[str, float] = {}
+		self.NextRefresh: typing.Dict[str, float] = {}
+		self.Running: typing.Set[str] = set()
+
+		metrics_service = self.App.get_service("asab.MetricsService")
+		self.CountDurationGauge = metrics_service.create_gauge(
+			"credentials_count_duration",
+			tags={"help": "Duration of the last credentials count per provider.", "unit": "seconds"},
+			init_values={provider.ProviderID: 0 for provider in credentials_svc.CredentialProviders.values()})
+
+		self.App.PubSub.subscribe("Application.tick/10!", self._on_tick)
+		self.App.PubSub.subscribe("Credentials.created!", self._on_credentials_created)
+		self.App.PubSub.subscribe("Credentials.deleted!", self._on_credentials_deleted)
+
+
+	def get(self, provider_id: str) -> typing.Optional[int]:
+		"""
+		Get the last known count of the provider's credentials, or None if it is not known yet.
+		"""
+		return self.Counts.get(provider_id)
+
+
+	def _on_tick(self, event_name):
+		now = time.monotonic()
+		for provider_id in self.CredentialsService.CredentialProviders:
+			if provider_id in self.Running:
+				continue
+			if self.NextRefresh.get(provider_id, 0) > now:
+				continue
+			self.Running.add(provider_id)
+			self.TaskService.schedule(self._refresh(provider_id))
+
+
+	async def _refresh(self, provider_id: str):
+		provider = self.CredentialsService.CredentialProviders[provider_id]
+		start = time.monotonic()
+		try:
+			count = await provider.count()
+		except Exception as e:
+			L.error("Failed to count credentials: {}".format(e), struct_data={"provider": provider_id})
+			count = None
+		finally:
+			self.Running.discard(provider_id)
+
+		duration = time.monotonic() - start
+		self.CountDurationGauge.set(provider_id, duration)
+
+		interval = self.Intervals.get(provider_id, self.RefreshInterval)
+		if count is None or count < 0 or duration > self.SlowCountThreshold:
+			# Back off from providers that are slow or unable to count
+			interval = min(interval * 2, self.MaxRefreshInterval)
+		else:
+			interval = self.RefreshInterval
+		self.Intervals[provider_id] = interval
+		self.NextRefresh[provider_id] = time.monotonic() + interval
+
+		if count is None or count < 0:
+			return
+		self._set(provider_id, count)
+
+
+	def _on_credentials_created(self, event_name, credentials_id: str):
+		self._adjust(credentials_id, 1)
+
+
+	def _on_credentials_deleted(self, event_name, credentials_id: str):
+		self._adjust(credentials_id, -1)
+
+
+	def _adjust(self, credentials_id: str, delta: int):
+		try:
+			provider = self.CredentialsService.get_provider(credentials_id)
+		except KeyError:
+			return
+		count = self.Counts.get(provider.ProviderID)
+		if count is None:
+			return
+		self._set(provider.ProviderID, max(0, count + delta))
+
+
+	def _set(self, provider_id: str, count: int):
+		self.Counts[provider_id] = count
+		self.CredentialsService.CredentialsGauge.set(provider_id, count)
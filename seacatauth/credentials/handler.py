@@ -83,6 +83,7 @@ class CredentialsHandler(object):
 		providers = {}
 		for provider_id in self.CredentialsService.CredentialProviders:
 			providers[provider_id] = self.CredentialsService.get_provider_info(provider_id)
+			providers[provider_id]["count"] = self.CredentialsService.get_cached_count(provider_id)
 		return asab.web.rest.json_response(request, providers)
 
 
@@ -96,6 +97,7 @@ class CredentialsHandler(object):
 		response = {
 			"result": "OK",  # TODO: Redundant field
 			**data,
+			"count": self.CredentialsService.get_cached_count(provider_id),
 		}
 		return asab.web.rest.json_response(request, response)
 
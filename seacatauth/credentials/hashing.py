@@ -0,0 +1,98 @@
+import asyncio
+import concurrent.futures
+import logging
+import time
+import asab
+
+from .. import generic
+
+
+L = logging.getLogger(__name__)
+
+
+class PasswordHashingService(asab.Service):
+	"""
+	Compute and verify password and secret hashes outside of the event loop.
+
+	Password hashing functions are deliberately slow. Running them directly in a coroutine
+	blocks the event loop, and with it every other request handled by the worker.
+	"""
+
+	def __init__(self, app, service_name="seacatauth.PasswordHashingService"):
+		super().__init__(app, service_name)
+
+		max_workers = asab.Config.get("seacatauth:hashing", "max_workers")
+		if len(max_workers) > 0:
+			max_workers = int(max_workers)
+		else:
+			# Let the executor decide based on the number of CPUs
+			max_workers = None
+
+		executor_type = asab.Config.get("seacatauth:hashing", "executor")
+		if executor_type == "thread":
+			self.Executor = concurrent.futures.ThreadPoolExecutor(
+				max_workers=max_workers,
+				thread_name_prefix="SeacatAuthHashingThread",
+			)
+		elif executor_type == "process":
+			self.Executor = concurrent.futures.ProcessPoolExecutor(max_workers=max_workers)
+		else:
+			raise ValueError(
+				"Unsupported hashing executor type: {!r}. Use 'thread' or 'process'.".format(executor_type))
+
+		# Bound the number of jobs submitted to the executor at once.
+		# Excess requests wait in the event loop without occupying the executor queue.
+		self.QueueSize = asab.Config.getint("seacatauth:hashing", "queue_size")
+		if self.QueueSize <= 0:
+			raise ValueError("Hashing queue_size must be a positive integer.")
+		self.QueueSemaphore = asyncio.Semaphore(self.QueueSize)
+		self.PendingCount = 0
+
+		# Metrics
+		self.MetricsService = app.get_service("asab.MetricsService")
+		self.QueueGauge = self.MetricsService.create_gauge(
+			"password_hashing_queue",
+			tags={"help": "Counts hashing jobs that are waiting or running."},
+			init_values={"pending": 0})
+		self.DurationHistogram = self.MetricsService.create_histogram(
+			"password_hashing_duration",
+			buckets=[0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, float("inf")],
+			tags={"help": "Duration of hashing jobs including the time spent in queue.", "unit": "seconds"})
+
+
+	async def finalize(self, app):
+		self.Executor.shutdown(wait=False)
+
+
+	async def verify(self, hash: str, secret: bytes | str) -> bool:
+		"""
+		Check if the secret matches the hash. Hash function is detected from the hash prefix.
+		"""
+		if hash.startswith("$2b$") or hash.startswith("$2a$") or hash.startswith("$2y$"):
+			return await self._execute("verify", generic.bcrypt_verify, hash, secret)
+		elif hash.startswith("$argon2id$"):
+			return await self._execute("verify", generic.argon2_verify, hash, secret)
+		else:
+			L.warning("Unknown password hash function: {}".format(hash[:4]))
+			return False
+
+
+	async def bcrypt_hash(self, secret: bytes | str) -> str:
+		return await self._execute("hash", generic.bcrypt_hash, secret)
+
+
+	async def argon2_hash(self, secret: bytes | str) -> str:
+		return await self._execute("hash", generic.argon2_hash, secret)
+
+
+	async def _execute(self, operation: str, func, *args):
+		self.PendingCount += 1
+		self.QueueGauge.set("pending", self.PendingCount)
+		start = time.perf_counter()
+		try:
+			async with self.QueueSemaphore:
+				return await self.App.Loop.run_in_executor(self.Executor, func, *args)
+		finally:
+			self.PendingCount -= 1
+			self.QueueGauge.set("pending", self.PendingCount)
+			self.DurationHistogram.set(operation, time.perf_counter() - start)
@@ -1,13 +1,16 @@
 import abc
+import asyncio
 import logging
 import typing
 import asab
 
-from ... import generic
 
 
 L = logging.getLogger(__name__)
 
+# Number of credentials fetched at once when listing credentials by their IDs
+_GET_CONCURRENCY = 20
+
 
 class CredentialsProviderABC(asab.Configurable, abc.ABC):
 
@@ -89,21 +92,105 @@ class CredentialsProviderABC(asab.Configurable, abc.ABC):
 			yield item
 
 
+	async def list_by_ids(
+		self,
+		credentials_ids: typing.Iterable[str],
+		offset: int = 0,
+		limit: int = -1,
+		filtr: str = None,
+		suspended: typing.Optional[bool] = None,
+	) -> dict:
+		"""
+		List credentials from a set of credentials IDs that match the filter.
+
+		Providers should override this with a single query. The default implementation fetches the requested
+		credentials by their IDs, a few at a time, in the order of their IDs. Without filters, only the requested
+		page is fetched and "count" includes all the requested IDs. With filters, fetching stops once the page
+		is full, and "count" then includes only the credentials matched so far.
+
+		Args:
+			credentials_ids: Candidate credentials IDs
+			offset: Number of matching credentials to skip
+			limit: Maximum number of credentials to return, -1 for no limit
+			filtr: Simple string filter, same as in iterate()
+			suspended: Return only suspended (True) or only active (False) credentials, or both (None)
+
+		Returns:
+			dict: A dict with "data" and "count" keys. "count" is the number of matching credentials.
+		"""
+		credentials_ids = sorted(set(credentials_ids))
+		data = []
+		if filtr is None and suspended is None:
+			# Any existing credentials match, so only the requested page needs to be fetched
+			end = None if limit < 0 else offset + limit
+			async for credentials in self._iterate_by_ids(credentials_ids[offset:end]):
+				data.append(credentials)
+			return {"data": data, "count": len(credentials_ids)}
+
+		count = 0
+		async for credentials in self._iterate_by_ids(credentials_ids):
+			if filtr is not None and not self._matches_filter(credentials, filtr):
+				continue
+			if suspended is not None and bool(credentials.get("suspended", False)) != suspended:
+				continue
+			count += 1
+			if count <= offset:
+				continue
+			data.append(credentials)
+			if limit >= 0 and len(data) >= limit:
+				break
+
+		return {"data": data, "count": count}
+
+
+	async def _iterate_by_ids(self, credentials_ids: typing.List[str]):
+		"""
+		Fetch credentials by their IDs concurrently in small batches. Credentials that do not exist are skipped.
+		"""
+		for i in range(0, len(credentials_ids), _GET_CONCURRENCY):
+			results = await asyncio.gather(
+				*(self.get(credentials_id) for credentials_id in credentials_ids[i:i + _GET_CONCURRENCY]),
+				return_exceptions=True,
+			)
+			for credentials in results:
+				if credentials is None or isinstance(credentials, KeyError):
+					# CredentialsNotFoundError is a KeyError too
+					continue
+				if isinstance(credentials, BaseException):
+					raise credentials
+				yield credentials
+
+
+	def _matches_filter(self, credentials: dict, filtr: str) -> bool:
+		"""
+		Check whether the credentials match the simple string filter the way iterate() applies it.
+		"""
+		return filtr.lower() in credentials.get("username", "").lower()
+
+
 	async def authenticate(self, credentials_id: str, credentials: dict) -> bool:
 		return False
 
 
-	def _verify_password(self, hash: str, password: str) -> bool:
+	async def _verify_password(self, hash: str, password: str) -> bool:
 		"""
 		Check if the password matches the hash.
 		"""
-		if hash.startswith("$2b$") or hash.startswith("$2a$") or hash.startswith("$2y$"):
-			return generic.bcrypt_verify(hash, password)
-		elif hash.startswith("$argon2id$"):
-			return generic.argon2_verify(hash, password)
+		hashing_service = self.App.get_service("seacatauth.PasswordHashingService")
+		return await hashing_service.verify(hash, password)
+
+
+	async def _hash_password(self, password: str, algorithm: str = "argon2") -> str:
+		"""
+		Compute password hash using the specified algorithm ("argon2" or "bcrypt").
+		"""
+		hashing_service = self.App.get_service("seacatauth.PasswordHashingService")
+		if algorithm == "argon2":
+			return await hashing_service.argon2_hash(password)
+		elif algorithm == "bcrypt":
+			return await hashing_service.bcrypt_hash(password)
 		else:
-			L.warning("Unknown password hash function: {}".format(hash[:4]))
-			return False
+			raise ValueError("Unsupported password hash algorithm: {!r}".format(algorithm))
 
 
 	def _format_credentials_id(self, obj_id: str) -> str:
@@ -6,7 +6,7 @@ import typing
 import asab
 
 from .abc import EditableCredentialsProviderABC
-from ... import generic, exceptions
+from ... import exceptions
 
 
 L = logging.getLogger(__name__)
@@ -57,7 +57,7 @@ class DictCredentialsProvider(EditableCredentialsProviderABC):
 		if "phone" in credentials:
 			credentials_object["phone"] = credentials["phone"]
 		if "password" in credentials:
-			credentials_object["__password"] = generic.bcrypt_hash(credentials["password"])
+			credentials_object["__password"] = await self._hash_password(credentials["password"], "bcrypt")
 
 		self.Dictionary[obj_id] = credentials_object
 		return self._format_credentials_id(obj_id)
@@ -76,7 +76,7 @@ class DictCredentialsProvider(EditableCredentialsProviderABC):
 		# Update the password
 		if "password" in update:
 			new_pwd = update.pop("password")
-			credentials["__password"] = generic.bcrypt_hash(new_pwd)
+			credentials["__password"] = await self._hash_password(new_pwd, "bcrypt")
 
 		for k, v in update.items():
 			credentials[k] = v
@@ -148,7 +148,7 @@ class DictCredentialsProvider(EditableCredentialsProviderABC):
 		if credentials_db is None:
 			return False
 
-		if generic.bcrypt_verify(credentials_db["__password"], password):
+		if await self._verify_password(credentials_db["__password"], password):
 			return True
 
 		return False
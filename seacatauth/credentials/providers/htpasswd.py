@@ -99,7 +99,7 @@ class HTPasswdCredentialsProvider(CredentialsProviderABC):
 		if not password_hash:
 			return False
 
-		if self._verify_password(password_hash, password):
+		if await self._verify_password(password_hash, password):
 			return True
 
 		return False
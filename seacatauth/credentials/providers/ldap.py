@@ -3,10 +3,15 @@ import logging
 import base64
 import datetime
 import contextlib
+import queue
+import threading
+import time
 import typing
 
 
 import ldap
+import ldap.controls
+import ldap.controls.sss
 import ldap.resiter
 import ldap.filter
 import asab
@@ -19,6 +24,9 @@ from ... import exceptions
 
 L = logging.getLogger(__name__)
 
+# How many times a failed paged search is restarted before the iteration gives up
+_MAX_SEARCH_RESTARTS = 3
+
 
 _TLS_VERSION = {
 	"1.0": ldap.OPT_X_TLS_PROTOCOL_TLS1_0,
@@ -73,6 +81,15 @@ class LDAPCredentialsProvider(CredentialsProviderABC):
 		"tls_cipher_suite": "",
 
 		"attrusername": "sAMAccountName",  # LDAP attribute that should be used as a username, e.g. `uid` or `sAMAccountName`
+
+		# Maximum number of bound service account connections kept open to the LDAP server
+		"pool_size": "5",
+
+		# Pooled connections that have been idle for longer than this are checked before they are reused
+		"pool_health_check_interval": "60 s",
+
+		# Number of entries requested from the server at once using the Simple Paged Results control (RFC 2696)
+		"page_size": "500",
 	}
 
 
@@ -96,6 +113,46 @@ class LDAPCredentialsProvider(CredentialsProviderABC):
 		if len(self.Config["attrusername"]) > 0:
 			self.IdentFields.append(self.Config["attrusername"])
 
+		self.MetricsService = app.get_service("asab.MetricsService")
+		metrics_tags = {"provider": self.ProviderID}
+		self.BindCounter = self.MetricsService.create_counter(
+			"ldap_binds",
+			tags={"help": "Counts service account connections opened and closed.", **metrics_tags},
+			init_values={"bind": 0, "close": 0})
+		self.PoolWaitHistogram = self.MetricsService.create_histogram(
+			"ldap_pool_wait",
+			buckets=[0.001, 0.01, 0.05, 0.1, 0.5, 1, 5, float("inf")],
+			tags={"help": "Time spent waiting for a pooled LDAP connection.", "unit": "seconds", **metrics_tags})
+
+		self.ConnectionPool = _LDAPConnectionPool(
+			connect=self._connect,
+			size=self.Config.getint("pool_size"),
+			health_check_interval=self.Config.getseconds("pool_health_check_interval"),
+			bind_counter=self.BindCounter,
+			wait_histogram=self.PoolWaitHistogram,
+		)
+		app.PubSub.subscribe("Application.exit!", self._on_exit)
+
+		self.PageSize = self.Config.getint("page_size")
+		# Whether the server supports the Server Side Sorting control; detected on first search
+		self.ServerSideSort: typing.Optional[bool] = None
+
+
+	def _on_exit(self, event_name):
+		self.ConnectionPool.close()
+
+
+	async def _execute(self, worker, *args):
+		"""
+		Run the worker in a proactor thread.
+		Retry once if the server connection is lost, since the worker may have received a stale pooled connection.
+		"""
+		try:
+			return await self.ProactorService.execute(worker, *args)
+		except ldap.SERVER_DOWN:
+			L.info("LDAP connection lost, retrying.", struct_data={"provider_id": self.ProviderID})
+			return await self.ProactorService.execute(worker, *args)
+
 
 	async def get(
 		self,
@@ -108,7 +165,7 @@ class LDAPCredentialsProvider(CredentialsProviderABC):
 			raise exceptions.CredentialsNotFoundError(credentials_id)
 
 		try:
-			return await self.ProactorService.execute(self._get_worker, cn)
+			return await self._execute(self._get_worker, cn)
 		except KeyError as e:
 			raise exceptions.CredentialsNotFoundError(credentials_id) from e
 		except ldap.SERVER_DOWN:
@@ -123,7 +180,7 @@ class LDAPCredentialsProvider(CredentialsProviderABC):
 		# TODO: Implement pagination
 		filterstr = self._build_search_filter(filter)
 		try:
-			return await self.ProactorService.execute(self._search_worker, filterstr)
+			return await self._execute(self._search_worker, filterstr)
 		except ldap.SERVER_DOWN:
 			L.warning("LDAP server is down.", struct_data={"provider_id": self.ProviderID, "uri": self.LdapUri})
 			return []
@@ -132,10 +189,12 @@ class LDAPCredentialsProvider(CredentialsProviderABC):
 			return []
 
 
-	async def count(self, filtr=None) -> int:
+	async def count(self, filtr=None) -> typing.Optional[int]:
+		# Counting walks the whole subtree. The total count is cached by CredentialsService, which also
+		# backs off from slow providers.
 		filterstr = self._build_search_filter(filtr)
 		try:
-			return await self.ProactorService.execute(self._count_worker, filterstr)
+			return await self._execute(self._count_worker, filterstr)
 		except ldap.SERVER_DOWN:
 			L.warning("LDAP server is down.", struct_data={"provider_id": self.ProviderID, "uri": self.LdapUri})
 			return None
@@ -145,22 +204,74 @@ class LDAPCredentialsProvider(CredentialsProviderABC):
 
 
 	async def iterate(self, offset: int = 0, limit: int = -1, filtr: str = None):
+		"""
+		Stream matching credentials page by page.
+
+		A paged search can only be continued on the connection that started it, so a pooled connection
+		is reserved for the whole iteration. Every page is fetched in a separate proactor call, so slow
+		consumers do not hold a thread. Entries before the offset are passed over in pages that carry
+		no attributes. If the search fails, it is restarted on a new connection from the position reached.
+		"""
 		filterstr = self._build_search_filter(filtr)
+		skip = offset
+		remaining = None if limit < 0 else limit
+		yielded = 0
+		restarts = 0
+		cookie = ""
+		ldap_client = None
 		try:
-			results = await self.ProactorService.execute(self._search_worker, filterstr)
-		except ldap.SERVER_DOWN:
-			L.warning("LDAP server is down.", struct_data={"provider_id": self.ProviderID, "uri": self.LdapUri})
-			return
-		except ldap.INVALID_CREDENTIALS:
-			L.error("Invalid LDAP credentials.", struct_data={"provider_id": self.ProviderID, "uri": self.LdapUri})
-			return
-		for i in results[offset:(None if limit == -1 else limit + offset)]:
-			yield i
+			while remaining is None or remaining > 0:
+				if skip > 0:
+					size, attrlist = min(self.PageSize, skip), ["1.1"]
+				else:
+					size = self.PageSize if remaining is None else min(self.PageSize, remaining)
+					attrlist = self.AttrList
+
+				try:
+					if ldap_client is None:
+						ldap_client = await self.ProactorService.execute(self.ConnectionPool.acquire)
+					page, cookie = await self.ProactorService.execute(
+						self._page_worker, ldap_client, filterstr, attrlist, size, cookie)
+				except ldap.INVALID_CREDENTIALS:
+					L.error("Invalid LDAP credentials.", struct_data={"provider_id": self.ProviderID, "uri": self.LdapUri})
+					cookie = ""
+					return
+				except ldap.LDAPError as e:
+					# The connection was lost or the server cannot continue the search (e.g. the cookie is stale)
+					cookie = ""
+					if ldap_client is not None:
+						await self.ProactorService.execute(self.ConnectionPool.release, ldap_client, True)
+						ldap_client = None
+					if restarts >= _MAX_SEARCH_RESTARTS:
+						L.error("LDAP paged search failed.", struct_data={
+							"provider_id": self.ProviderID, "uri": self.LdapUri, "error": repr(e)})
+						return
+					restarts += 1
+					L.info("LDAP paged search failed, restarting.", struct_data={
+						"provider_id": self.ProviderID, "error": repr(e)})
+					skip = offset + yielded
+					continue
+
+				if skip > 0:
+					skip = max(0, skip - len(page))
+				else:
+					for credentials in page:
+						yield credentials
+					yielded += len(page)
+					if remaining is not None:
+						remaining -= len(page)
+
+				if not cookie:
+					return
+
+		finally:
+			if ldap_client is not None:
+				await self.ProactorService.execute(self._release_worker, ldap_client, filterstr, cookie)
 
 
 	async def locate(self, ident: str, ident_fields: dict = None, login_dict: dict = None) -> str:
 		try:
-			return await self.ProactorService.execute(self._locate_worker, ident, ident_fields)
+			return await self._execute(self._locate_worker, ident, ident_fields)
 		except ldap.SERVER_DOWN:
 			L.warning("LDAP server is down.", struct_data={"provider_id": self.ProviderID, "uri": self.LdapUri})
 			return None
@@ -198,8 +309,10 @@ class LDAPCredentialsProvider(CredentialsProviderABC):
 		}]
 
 
-	@contextlib.contextmanager
-	def _ldap_client(self):
+	def _connect(self):
+		"""
+		Open a new connection and bind it with the service account.
+		"""
 		ldap_client = _LDAPObject(self.LdapUri)
 		ldap_client.protocol_version = ldap.VERSION3
 		ldap_client.set_option(ldap.OPT_REFERRALS, 0)
@@ -211,10 +324,24 @@ class LDAPCredentialsProvider(CredentialsProviderABC):
 			_enable_tls(ldap_client, self.Config)
 
 		ldap_client.simple_bind_s(self.Config["username"], self.Config["password"])
+		return ldap_client
+
+
+	@contextlib.contextmanager
+	def _ldap_client(self):
+		"""
+		Borrow a bound connection from the pool.
+		Connections that fail with a connection error are discarded instead of being returned to the pool.
+		"""
+		ldap_client = self.ConnectionPool.acquire()
+		discard = False
 		try:
 			yield ldap_client
+		except (ldap.SERVER_DOWN, ldap.CONNECT_ERROR, ldap.TIMEOUT):
+			discard = True
+			raise
 		finally:
-			ldap_client.unbind_s()
+			self.ConnectionPool.release(ldap_client, discard=discard)
 
 
 	def _get_worker(self, cn: str) -> typing.Optional[typing.Dict]:
@@ -241,43 +368,161 @@ class LDAPCredentialsProvider(CredentialsProviderABC):
 
 
 	def _search_worker(self, filterstr: str) -> typing.List[typing.Dict]:
-		# TODO: Implement sorting (Note that not all LDAP servers support server-side sorting)
 		results = []
 		with self._ldap_client() as ldap_client:
-			msgid = ldap_client.search(
-				self.Base,
-				ldap.SCOPE_SUBTREE,
-				filterstr=filterstr,
-				attrlist=self.AttrList,
-			)
-			result_iter = ldap_client.allresults(msgid)
-
-			for res_type, res_data, res_msgid, res_controls in result_iter:
-				for dn, entry in res_data:
-					if dn is not None:
-						results.append(self._normalize_credentials(dn, entry))
+			for dn, entry in self._paged_search(ldap_client, filterstr, self.AttrList):
+				results.append(self._normalize_credentials(dn, entry))
 
 		return results
 
 
+	def _page_worker(
+		self,
+		ldap_client,
+		filterstr: str,
+		attrlist: typing.List[str],
+		size: int,
+		cookie: str,
+	) -> typing.Tuple[typing.List[typing.Dict], str]:
+		"""
+		Fetch one page of a paged search on a reserved connection.
+
+		Returns:
+			Normalized credentials (placeholders when no attributes are requested) and the cookie of the next page
+		"""
+		msgid = ldap_client.search_ext(
+			self.Base,
+			ldap.SCOPE_SUBTREE,
+			filterstr=filterstr,
+			attrlist=attrlist,
+			serverctrls=self._search_controls(ldap_client, size, cookie),
+		)
+		_, res_data, _, res_controls = ldap_client.result3(msgid)
+
+		cookie = _get_page_cookie(res_controls)
+		if attrlist == ["1.1"]:
+			# Skipping page, only the number of entries matters
+			return [None for dn, _ in res_data if dn is not None], cookie
+		return [
+			self._normalize_credentials(dn, entry)
+			for dn, entry in res_data
+			if dn is not None  # Skip search references
+		], cookie
+
+
+	def _release_worker(self, ldap_client, filterstr: str, cookie: str):
+		"""
+		Return a reserved connection to the pool, abandoning its unfinished paged search.
+		"""
+		if cookie:
+			# The search was not read to the end, abandon it to release server resources
+			self._abandon_paged_search(ldap_client, filterstr, self._search_controls(ldap_client, 0, cookie))
+		self.ConnectionPool.release(ldap_client)
+
+
 	def _count_worker(self, filterstr: str) -> int:
 		count = 0
 		with self._ldap_client() as ldap_client:
-			msgid = ldap_client.search(
+			# For counting, no attributes are needed
+			for _ in self._paged_search(ldap_client, filterstr, ["1.1"], sort=False):
+				count += 1
+
+		return count
+
+
+	def _paged_search(
+		self,
+		ldap_client,
+		filterstr: str,
+		attrlist: typing.List[str],
+		max_entries: typing.Optional[int] = None,
+		sort: bool = True,
+	) -> typing.Iterator[typing.Tuple[str, typing.Mapping]]:
+		"""
+		Search the subtree using the Simple Paged Results control and yield (dn, entry) tuples.
+		The results are sorted by username if the server supports it.
+		Stops after max_entries entries if specified.
+		"""
+		server_controls = self._search_controls(ldap_client, self.PageSize, "", sort=sort)
+		page_control = server_controls[0]
+
+		try:
+			while True:
+				if max_entries is not None:
+					if max_entries <= 0:
+						return
+					page_control.size = min(self.PageSize, max_entries)
+				msgid = ldap_client.search_ext(
+					self.Base,
+					ldap.SCOPE_SUBTREE,
+					filterstr=filterstr,
+					attrlist=attrlist,
+					serverctrls=server_controls,
+				)
+				_, res_data, _, res_controls = ldap_client.result3(msgid)
+
+				page_control.cookie = _get_page_cookie(res_controls)
+
+				for dn, entry in res_data:
+					if dn is None:
+						# Skip search references
+						continue
+					if max_entries is not None:
+						if max_entries <= 0:
+							return
+						max_entries -= 1
+					yield dn, entry
+
+				if not page_control.cookie:
+					return
+
+		finally:
+			if page_control.cookie:
+				# The search was not read to the end, abandon it to release server resources
+				page_control.size = 0
+				self._abandon_paged_search(ldap_client, filterstr, server_controls)
+
+
+	def _search_controls(self, ldap_client, size: int, cookie: str, sort: bool = True) -> list:
+		"""
+		Build the server controls of a paged search. The paged results control is always the first one.
+		The results are sorted by username if the server supports it.
+		"""
+		server_controls = [ldap.controls.SimplePagedResultsControl(True, size=size, cookie=cookie)]
+		if sort and self._supports_server_side_sort(ldap_client):
+			server_controls.append(ldap.controls.sss.SSSRequestControl(
+				criticality=False,
+				ordering_rules=[self.Config["attrusername"]],
+			))
+		return server_controls
+
+
+	def _abandon_paged_search(self, ldap_client, filterstr: str, server_controls: list):
+		"""
+		Request a page of size zero, which ends the paged search on the server.
+		"""
+		try:
+			ldap_client.search_ext_s(
 				self.Base,
 				ldap.SCOPE_SUBTREE,
 				filterstr=filterstr,
-				attrsonly=1,  # If attrsonly is non-zero
-				attrlist=["cn", "mail", "mobile"],  # For counting, we need only absolutely minimum set of attributes
+				attrlist=["1.1"],
+				serverctrls=server_controls,
 			)
-			result_iter = ldap_client.allresults(msgid)
+		except ldap.LDAPError:
+			pass
 
-			for res_type, res_data, res_msgid, res_controls in result_iter:
-				for dn, entry in res_data:
-					if dn is not None:
-						count += 1
 
-		return count
+	def _supports_server_side_sort(self, ldap_client) -> bool:
+		if self.ServerSideSort is None:
+			try:
+				results = ldap_client.search_s("", ldap.SCOPE_BASE, attrlist=["supportedControl"])
+				_, root_dse = results[0]
+				supported_controls = [c.decode("utf-8") for c in root_dse.get("supportedControl", [])]
+				self.ServerSideSort = ldap.controls.sss.SSSRequestControl.controlType in supported_controls
+			except (ldap.LDAPError, IndexError):
+				self.ServerSideSort = False
+		return self.ServerSideSort
 
 
 	def _locate_worker(
@@ -309,6 +554,7 @@ class LDAPCredentialsProvider(CredentialsProviderABC):
 
 
 	def _authenticate_worker(self, dn: str, password: str) -> bool:
+		# User binds change the identity of the connection, so they do not use the service account pool
 		ldap_client = _LDAPObject(self.LdapUri)
 		ldap_client.protocol_version = ldap.VERSION3
 		ldap_client.set_option(ldap.OPT_REFERRALS, 0)
@@ -423,6 +669,11 @@ class LDAPCredentialsProvider(CredentialsProviderABC):
 		return cn
 
 
+	def _matches_filter(self, credentials: dict, filtr: str) -> bool:
+		# The username must START WITH the filter string, see _build_search_filter
+		return credentials.get("username", "").lower().startswith(filtr.lower())
+
+
 	def _build_search_filter(self, filtr: typing.Optional[str] = None) -> str:
 		if not filtr:
 			filterstr = self.Filter
@@ -443,6 +694,98 @@ class _LDAPObject(ldap.ldapobject.LDAPObject, ldap.resiter.ResultProcessor):
 	pass
 
 
+class _LDAPConnectionPool:
+	"""
+	Bounded pool of bound LDAP connections shared by proactor threads.
+
+	Callers block in `acquire()` until a connection slot is available.
+	Idle connections are health-checked before reuse and replaced if the check fails.
+	"""
+
+	def __init__(self, connect, size: int, health_check_interval: float, bind_counter, wait_histogram):
+		if size <= 0:
+			raise ValueError("LDAP 'pool_size' must be a positive integer.")
+		self.Connect = connect
+		self.HealthCheckInterval = health_check_interval
+		self.BindCounter = bind_counter
+		self.WaitHistogram = wait_histogram
+
+		self.Slots = threading.BoundedSemaphore(size)
+		# LIFO keeps the most recently used connections warm and lets the rest age out
+		self.Idle = queue.LifoQueue()
+
+
+	def acquire(self):
+		start = time.perf_counter()
+		self.Slots.acquire()
+		self.WaitHistogram.set("acquire", time.perf_counter() - start)
+
+		try:
+			while True:
+				try:
+					ldap_client, released_at = self.Idle.get_nowait()
+				except queue.Empty:
+					break
+				if time.monotonic() - released_at < self.HealthCheckInterval:
+					return ldap_client
+				if self._is_healthy(ldap_client):
+					return ldap_client
+				self._close(ldap_client)
+
+			ldap_client = self.Connect()
+			self.BindCounter.add("bind", 1)
+			return ldap_client
+
+		except BaseException:
+			self.Slots.release()
+			raise
+
+
+	def release(self, ldap_client, discard: bool = False):
+		try:
+			if discard:
+				self._close(ldap_client)
+			else:
+				self.Idle.put((ldap_client, time.monotonic()))
+		finally:
+			self.Slots.release()
+
+
+	def close(self):
+		"""
+		Close all idle connections.
+		"""
+		while True:
+			try:
+				ldap_client, _ = self.Idle.get_nowait()
+			except queue.Empty:
+				return
+			self._close(ldap_client)
+
+
+	def _is_healthy(self, ldap_client) -> bool:
+		try:
+			ldap_client.whoami_s()
+			return True
+		except ldap.LDAPError:
+			return False
+
+
+	def _close(self, ldap_client):
+		self.BindCounter.add("close", 1)
+		try:
+			ldap_client.unbind_s()
+		except ldap.LDAPError:
+			pass
+
+
+def _get_page_cookie(res_controls) -> str:
+	for control in res_controls:
+		if control.controlType == ldap.controls.SimplePagedResultsControl.controlType:
+			return control.cookie
+	return ""
+
+
 def _parse_timestamp(ts: str) -> datetime.datetime:
 	try:
 		return datetime.datetime.strptime(ts, r"%Y%m%d%H%M%SZ")
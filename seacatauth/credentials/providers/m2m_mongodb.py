@@ -4,7 +4,6 @@ import asab.storage.exceptions
 import pymongo
 
 from .mongodb import MongoDBCredentialsProvider
-from ... import generic
 from ...events import EventTypes
 
 
@@ -77,7 +76,7 @@ class M2MMongoDBCredentialsProvider(MongoDBCredentialsProvider):
 		u = self.MongoDBStorageService.upsertor(self.CredentialsCollection, obj_id)
 
 		u.set("username", credentials["username"])
-		u.set("__password", generic.argon2_hash(credentials["password"]))
+		u.set("__password", await self._hash_password(credentials["password"]))
 
 		obj_id = await u.execute(event_type=EventTypes.M2M_CREDENTIALS_CREATED)
 		credentials_id = self._format_credentials_id(obj_id)
@@ -13,7 +13,7 @@ import pymongo
 import pymongo.errors
 
 from .abc import RegistrableCredentialsProviderABC
-from ... import generic, exceptions
+from ... import exceptions
 from ...events import EventTypes
 
 
@@ -149,7 +149,7 @@ class MongoDBCredentialsProvider(RegistrableCredentialsProviderABC):
 		# Update password
 		v = update.pop("password", None)
 		if v is not None:
-			u.set("__password", generic.argon2_hash(v))
+			u.set("__password", await self._hash_password(v))
 
 		# Update basic credentials
 		for key, value in update.items():
@@ -273,6 +273,46 @@ class MongoDBCredentialsProvider(RegistrableCredentialsProviderABC):
 			yield self._normalize_credentials(d)
 
 
+	async def list_by_ids(
+		self,
+		credentials_ids: typing.Iterable[str],
+		offset: int = 0,
+		limit: int = -1,
+		filtr: str = None,
+		suspended: typing.Optional[bool] = None,
+	) -> dict:
+		object_ids = []
+		for credentials_id in credentials_ids:
+			try:
+				object_ids.append(bson.ObjectId(self._format_object_id(credentials_id)))
+			except (ValueError, bson.errors.InvalidId):
+				continue
+		if len(object_ids) == 0:
+			return {"data": [], "count": 0}
+
+		query_filter = {"_id": {"$in": object_ids}}
+		query_filter.update(self.build_filter(filtr))
+		if suspended is True:
+			query_filter["suspended"] = True
+		elif suspended is False:
+			query_filter["suspended"] = {"$ne": True}
+
+		coll = await self.MongoDBStorageService.collection(self.CredentialsCollection)
+		cursor = coll.find(query_filter, skip=offset)
+		if limit >= 0:
+			cursor.limit(limit)
+		cursor.sort("username", 1)
+
+		data = []
+		async for d in cursor:
+			data.append(self._normalize_credentials(d))
+
+		return {
+			"data": data,
+			"count": await coll.count_documents(query_filter),
+		}
+
+
 	def _normalize_credentials(self, db_obj, include=None):
 		obj = {
 			"_id": self._format_credentials_id(db_obj["_id"]),
@@ -353,7 +393,7 @@ class MongoDBCredentialsProvider(RegistrableCredentialsProviderABC):
 			L.error("Authentication failed: User has no password set.", struct_data={"cid": credentials_id})
 			return False
 
-		if self._verify_password(password_hash, password):
+		if await self._verify_password(password_hash, password):
 			return True
 		else:
 			L.info("Authentication failed: Password verification failed", struct_data={"cid": credentials_id})
@@ -1,4 +1,7 @@
+import asyncio
+import contextlib
 import logging
+import time
 import typing
 import asab
 import aiomysql
@@ -6,7 +9,7 @@ import pymysql
 import re
 
 from .abc import CredentialsProviderABC, EditableCredentialsProviderABC
-from ... import generic, exceptions
+from ... import exceptions
 
 
 L = logging.getLogger(__name__)
@@ -34,7 +37,15 @@ class MySQLCredentialsProvider(CredentialsProviderABC):
 		"table": "users",
 		"user": "root",
 		"password": "",
-		"data_fields": ""
+		"data_fields": "",
+
+		# Connection pool size
+		"pool_min_size": "1",
+		"pool_max_size": "10",
+
+		# Pooled connections older than this are closed and replaced.
+		# Keep it shorter than the server's wait_timeout. Set to "0" to keep connections indefinitely.
+		"pool_recycle": "1 h",
 	}
 
 	def __init__(self, app, provider_id, config_section_name):
@@ -65,12 +76,78 @@ class MySQLCredentialsProvider(CredentialsProviderABC):
 		else:
 			self.DataFields = None
 
+		self.PoolMinSize = self.Config.getint("pool_min_size")
+		self.PoolMaxSize = self.Config.getint("pool_max_size")
+		self.PoolRecycle = int(self.Config.getseconds("pool_recycle")) or -1
+		self.Pool: typing.Optional[aiomysql.Pool] = None
+		self.PoolLock = asyncio.Lock()
+
+		self.MetricsService = app.get_service("asab.MetricsService")
+		metrics_tags = {"provider": self.ProviderID}
+		self.PoolGauge = self.MetricsService.create_gauge(
+			"mysql_pool",
+			tags={"help": "Counts connections in the MySQL connection pool.", **metrics_tags},
+			init_values={"size": 0, "free": 0})
+		self.PoolWaitHistogram = self.MetricsService.create_histogram(
+			"mysql_pool_wait",
+			buckets=[0.001, 0.01, 0.05, 0.1, 0.5, 1, 5, float("inf")],
+			tags={"help": "Time spent waiting for a pooled MySQL connection.", "unit": "seconds", **metrics_tags})
+
+		app.PubSub.subscribe("Application.tick/10!", self._on_tick_update_metrics)
+		app.PubSub.subscribe("Application.exit!", self._on_exit)
+		app.TaskService.schedule(self.initialize())
+
+
+	async def initialize(self):
+		await self._get_pool()
+
+
+	async def _get_pool(self) -> aiomysql.Pool:
+		if self.Pool is None:
+			async with self.PoolLock:
+				if self.Pool is None:
+					self.Pool = await aiomysql.create_pool(
+						minsize=self.PoolMinSize,
+						maxsize=self.PoolMaxSize,
+						pool_recycle=self.PoolRecycle,
+						# Pooled connections must not keep read transactions open between requests
+						autocommit=True,
+						**self.ConnectionParams
+					)
+		return self.Pool
+
+
+	@contextlib.asynccontextmanager
+	async def _connection(self):
+		"""
+		Borrow a connection from the pool.
+		"""
+		pool = await self._get_pool()
+		start = time.perf_counter()
+		async with pool.acquire() as connection:
+			self.PoolWaitHistogram.set("acquire", time.perf_counter() - start)
+			yield connection
+
+
+	def _on_tick_update_metrics(self, event_name):
+		if self.Pool is None:
+			return
+		self.PoolGauge.set("size", self.Pool.size)
+		self.PoolGauge.set("free", self.Pool.freesize)
+
+
+	async def _on_exit(self, event_name):
+		if self.Pool is not None:
+			# Connections in use are closed once they are released, so that running queries can finish
+			self.Pool.close()
+			await self.Pool.wait_closed()
+
 
 	async def locate(self, ident: str, ident_fields: dict = None, login_dict: dict = None) -> typing.Optional[str]:
 		kwargs = {"ident": ident}
 		if login_dict is not None:
 			kwargs.update(login_dict)
-		async with aiomysql.connect(**self.ConnectionParams) as connection:
+		async with self._connection() as connection:
 			async with connection.cursor(aiomysql.DictCursor) as cursor:
 				await cursor.execute(self.LocateQuery, kwargs)
 				result = await cursor.fetchone()
@@ -89,7 +166,7 @@ class MySQLCredentialsProvider(CredentialsProviderABC):
 		except ValueError:
 			raise exceptions.CredentialsNotFoundError(credentials_id)
 
-		async with aiomysql.connect(**self.ConnectionParams) as connection:
+		async with self._connection() as connection:
 			async with connection.cursor(aiomysql.DictCursor) as cursor:
 				await cursor.execute(self.GetQuery, {"_id": mysql_id})
 				result = await cursor.fetchone()
@@ -101,7 +178,7 @@ class MySQLCredentialsProvider(CredentialsProviderABC):
 
 	async def count(self, filtr=None) -> int:
 		# TODO: Filtering
-		async with aiomysql.connect(**self.ConnectionParams) as connection:
+		async with self._connection() as connection:
 			async with connection.cursor() as cursor:
 				return await cursor.execute(self.ListQuery)
 
@@ -114,7 +191,7 @@ class MySQLCredentialsProvider(CredentialsProviderABC):
 			offset = 0
 
 		results = []
-		async with aiomysql.connect(**self.ConnectionParams) as connection:
+		async with self._connection() as connection:
 			async with connection.cursor(aiomysql.DictCursor) as cursor:
 				nrows = await cursor.execute(self.ListQuery)
 				if nrows == 0:
@@ -137,24 +214,31 @@ class MySQLCredentialsProvider(CredentialsProviderABC):
 
 	async def iterate(self, offset: int = 0, limit: int = -1, filtr: str = None):
 		# TODO: Filtering
-		async with aiomysql.connect(**self.ConnectionParams) as connection:
-			async with connection.cursor(aiomysql.DictCursor) as cursor:
-				nrows = await cursor.execute(self.ListQuery)
-				if nrows == 0:
-					return
-				try:
-					await cursor.scroll(offset)
-				except IndexError:
-					L.error("MySQL: Out of range", struct_data={"query": self.ListQuery, "scroll": offset})
-					return
-				result = await cursor.fetchone()
-				while result is not None:
+		async with self._connection() as connection:
+			# Unbuffered cursor streams the rows instead of loading the whole result into memory
+			cursor = await connection.cursor(aiomysql.SSDictCursor)
+			complete = False
+			try:
+				await cursor.execute(self.ListQuery)
+				while True:
+					result = await cursor.fetchone()
+					if result is None:
+						complete = True
+						return
+					if offset > 0:
+						offset -= 1
+						continue
 					yield self._nomalize_credentials(result)
 					if limit > 0:
 						limit -= 1
 					if limit == 0:
 						return
-					result = await cursor.fetchone()
+			finally:
+				if complete:
+					await cursor.close()
+				else:
+					# Closing the cursor would read the rest of the result; drop the connection instead
+					connection.close()
 
 
 	async def authenticate(self, credentials_id: str, credentials: dict) -> bool:
@@ -172,7 +256,7 @@ class MySQLCredentialsProvider(CredentialsProviderABC):
 			return False
 
 		if self.PasswordField in dbcred:
-			if self._authenticate_password(dbcred, credentials):
+			if await self._authenticate_password(dbcred, credentials):
 				return True
 			else:
 				L.info("Authentication failed: Password verification failed", struct_data={"cid": credentials_id})
@@ -209,13 +293,13 @@ class MySQLCredentialsProvider(CredentialsProviderABC):
 		return normalized
 
 
-	def _authenticate_password(self, dbcred, credentials):
+	async def _authenticate_password(self, dbcred, credentials):
 		# This is here for a cryptoagility, if we migrate to a newer password hashing function,
 		# this if block will be extended
 		if dbcred[self.PasswordField].startswith("$2b$") \
 			or dbcred[self.PasswordField].startswith("$2a$") \
 			or dbcred[self.PasswordField].startswith("$2y$"):
-			if generic.bcrypt_verify(dbcred[self.PasswordField], credentials["password"]):
+			if await self._verify_password(dbcred[self.PasswordField], credentials["password"]):
 				return True
 			else:
 				return False
@@ -226,7 +310,7 @@ class MySQLCredentialsProvider(CredentialsProviderABC):
 
 class EditableMySQLCredentialsProvider(EditableCredentialsProviderABC, MySQLCredentialsProvider):
 	def __init__(self, app, provider_id, config_section_name):
-		super().__init__(provider_id, config_section_name)
+		super().__init__(app, provider_id, config_section_name)
 		self.CreateQuery = self.Config.get("create")
 		assert self.CreateQuery, "MySQL credentials: 'create' query must be specified"
 		self.UpdateQuery = self.Config.get("update")
@@ -245,12 +329,12 @@ class EditableMySQLCredentialsProvider(EditableCredentialsProviderABC, MySQLCred
 			if param not in credentials:
 				credentials[param] = None
 
-		async with aiomysql.connect(**self.ConnectionParams) as connection:
-			async with connection.cursor(aiomysql.DictCursor) as cursor:
-				await cursor.execute(self.CreateQuery, credentials)
-				await cursor.execute("SELECT LAST_INSERT_ID();")
-				obj_id = await cursor.fetchone()
+		async with self._connection() as connection:
 			try:
+				async with connection.cursor(aiomysql.DictCursor) as cursor:
+					await cursor.execute(self.CreateQuery, credentials)
+					await cursor.execute("SELECT LAST_INSERT_ID();")
+					obj_id = await cursor.fetchone()
 				await connection.commit()
 			except pymysql.err.IntegrityError as e:
 				raise ValueError("Cannot create credentials: {}".format(e)) from e
@@ -285,7 +369,7 @@ class EditableMySQLCredentialsProvider(EditableCredentialsProviderABC, MySQLCred
 
 		value = update.pop("password", None)
 		if value is not None:
-			new_credentials["__password"] = generic.argon2_hash(value)
+			new_credentials["__password"] = await self._hash_password(value)
 
 		value = update.pop("enforce_factors", None)
 		if value is not None:
@@ -297,10 +381,10 @@ class EditableMySQLCredentialsProvider(EditableCredentialsProviderABC, MySQLCred
 		if len(update) != 0:
 			raise KeyError("Some credentials fields cannot be updated: {}".format(", ".join(update.keys())))
 
-		async with aiomysql.connect(**self.ConnectionParams) as connection:
-			async with connection.cursor(aiomysql.DictCursor) as cursor:
-				await cursor.execute(self.UpdateQuery, new_credentials)
+		async with self._connection() as connection:
 			try:
+				async with connection.cursor(aiomysql.DictCursor) as cursor:
+					await cursor.execute(self.UpdateQuery, new_credentials)
 				await connection.commit()
 			except pymysql.err.IntegrityError as e:
 				raise ValueError("Cannot update credentials: {}".format(e)) from e
@@ -318,10 +402,10 @@ class EditableMySQLCredentialsProvider(EditableCredentialsProviderABC, MySQLCred
 		except ValueError:
 			raise exceptions.CredentialsNotFoundError(credentials_id)
 
-		async with aiomysql.connect(**self.ConnectionParams) as connection:
-			async with connection.cursor(aiomysql.DictCursor) as cursor:
-				await cursor.execute(self.DeleteQuery, {"_id": mysql_id})
+		async with self._connection() as connection:
 			try:
+				async with connection.cursor(aiomysql.DictCursor) as cursor:
+					await cursor.execute(self.DeleteQuery, {"_id": mysql_id})
 				await connection.commit()
 			except pymysql.err.IntegrityError as e:
 				raise ValueError("Cannot delete credentials: {}".format(e)) from e
@@ -169,7 +169,7 @@ class XMongoDBCredentialsProvider(CredentialsProviderABC):
 			L.error("Authentication failed: User has no password set.", struct_data={"cid": credentials_id})
 			return False
 
-		if self._verify_password(password_hash, password):
+		if await self._verify_password(password_hash, password):
 			return True
 		else:
 			L.info("Authentication failed: Password verification failed", struct_data={"cid": credentials_id})
@@ -8,6 +8,7 @@ import asab.exceptions
 import typing
 
 from .policy import CredentialsPolicy
+from .count_cache import CredentialsCountCache
 from .providers.abc import CredentialsProviderABC, EditableCredentialsProviderABC
 from .. import AuditLogger, exceptions
 
@@ -93,20 +94,15 @@ class CredentialsService(asab.Service):
 			tags={"help": "Counts credentials per provider."},
 			init_values={provider.ProviderID: 0 for _, provider in self.Providers}
 		)
-		app.PubSub.subscribe("Application.tick/10!", self._on_tick_metric)
+		self.CountCache = CredentialsCountCache(self)
 
 
-	def _on_tick_metric(self, event_name):
-		self.TaskService.schedule(self._metrics_task())
-
-
-	async def _metrics_task(self):
-		for _, provider in self.Providers:
-			total = await provider.count()
-			if total == -1:
-				continue
-			else:
-				self.CredentialsGauge.set(provider.ProviderID, total)
+	def get_cached_count(self, provider_id: str) -> typing.Optional[int]:
+		"""
+		Get the indicative count of the provider's credentials without querying the provider.
+		Returns None if the count is not known yet.
+		"""
+		return self.CountCache.get(provider_id)
 
 
 	def _prepare_ident_fields(self, ident_config):
@@ -216,30 +212,6 @@ class CredentialsService(asab.Service):
 				yield credobj
 
 
-	async def _tenant_filter(self, credentials_id: str, tenant_ids: typing.Iterable) -> bool:
-		if tenant_ids is None:
-			return True
-		tenant_svc = self.App.get_service("seacatauth.TenantService")
-		for tenant_id in tenant_ids:
-			try:
-				await tenant_svc.get_assigned_tenant(credentials_id, tenant_id)
-				return True
-			except KeyError:
-				return False
-
-
-	async def _role_filter(self, credentials_id: str, role_ids: typing.Iterable) -> bool:
-		if role_ids is None:
-			return True
-		role_svc = self.App.get_service("seacatauth.RoleService")
-		for role_id in role_ids:
-			try:
-				await role_svc.get_assigned_role(credentials_id, role_id)
-				return True
-			except KeyError:
-				return False
-
-
 	def _status_filter(self, credentials_data: dict, status_filter: typing.List[str] | None) -> bool:
 		if status_filter is None:
 			return True
@@ -274,23 +246,81 @@ class CredentialsService(asab.Service):
 
 		credentials = []
 		offset = page * limit
-		async for credentials_data in self.iterate_stable(filter=simple_filter):
-			if not await self._role_filter(credentials_data["_id"], searched_roles):
-				continue
-			if not await self._tenant_filter(credentials_data["_id"], searched_tenants):
-				continue
-			if not self._status_filter(credentials_data, status_filter):
-				continue
-			if offset > 0:
-				offset -= 1
+
+		if searched_tenants is None and searched_roles is None:
+			# No membership filter, stream the credentials from providers
+			async for credentials_data in self.iterate_stable(filter=simple_filter):
+				if not self._status_filter(credentials_data, status_filter):
+					continue
+				if offset > 0:
+					offset -= 1
+					continue
+				credentials.append(credentials_data)
+				if len(credentials) >= limit:
+					break
+			return {"data": credentials}
+
+		# Resolve the members of searched tenants and roles first,
+		# then let the providers fetch and filter the matching credentials at once
+		credentials_ids = await self._get_member_credentials_ids(searched_tenants, searched_roles)
+		if len(credentials_ids) == 0:
+			return {"data": credentials}
+		if status_filter is not None and "active" not in status_filter and "suspended" not in status_filter:
+			# Status filter does not match any credentials
+			return {"data": credentials}
+		suspended = _status_filter_to_suspended(status_filter)
+
+		for provider in self.CredentialProviders.values():
+			provider_credentials_ids = [
+				credentials_id for credentials_id in credentials_ids
+				if credentials_id.startswith(provider.Prefix)
+			]
+			if len(provider_credentials_ids) == 0:
 				continue
-			credentials.append(credentials_data)
+			result = await provider.list_by_ids(
+				provider_credentials_ids,
+				offset=offset,
+				limit=limit - len(credentials),
+				filtr=simple_filter,
+				suspended=suspended,
+			)
+			credentials.extend(result["data"])
+			offset = max(0, offset - result["count"])
 			if len(credentials) >= limit:
 				break
 
 		return {"data": credentials}
 
 
+	async def _get_member_credentials_ids(
+		self,
+		tenant_ids: typing.Optional[typing.Iterable[str]],
+		role_ids: typing.Optional[typing.Iterable[str]],
+	) -> typing.Set[str]:
+		"""
+		Get IDs of credentials that are members of any of the tenants and have any of the roles assigned.
+		"""
+		credentials_ids = None
+
+		if tenant_ids is not None:
+			tenant_provider = self.App.get_service("seacatauth.TenantService").get_provider()
+			assignments = await tenant_provider.list_tenant_assignments(list(tenant_ids))
+			credentials_ids = set(assignment["c"] for assignment in assignments["data"])
+
+		if role_ids is not None:
+			role_svc = self.App.get_service("seacatauth.RoleService")
+			role_members = set()
+			for role_id in role_ids:
+				async for assignment in role_svc.iterate_role_assignments(role_id):
+					role_members.add(assignment["c"])
+			if credentials_ids is None:
+				credentials_ids = role_members
+			else:
+				credentials_ids &= role_members
+
+		return credentials_ids
+
+
 	def get_provider(self, credentials_id):
 		try:
 			provider_type, provider_id, credentials_subid = credentials_id.split(":", 2)
@@ -707,6 +737,19 @@ def _authorize_searched_tenants(
 		return [tenant_ctx]
 
 
+def _status_filter_to_suspended(status_filter: typing.List[str] | None) -> typing.Optional[bool]:
+	"""
+	Translate status filter into the `suspended` argument of credentials providers.
+	"""
+	if status_filter is None:
+		return None
+	active = "active" in status_filter
+	suspended = "suspended" in status_filter
+	if active == suspended:
+		return None
+	return suspended
+
+
 def _authorize_searched_roles(
 	role_filter: str | None
 ) -> typing.Optional[typing.Iterable[str]]:
@@ -3,6 +3,7 @@ import heapq
 import random
 import logging
 import re
+import time
 import typing
 import urllib.parse
 import aiohttp.web
@@ -12,6 +13,7 @@ import asab.exceptions
 import bcrypt
 import argon2
 import hashlib
+import collections
 import collections.abc
 
 
@@ -162,11 +164,11 @@ async def nginx_introspection(
 			return aiohttp.web.HTTPForbidden()
 
 	# Extend session expiration
-	# (Do not extend algorithmic sessions)
-	if not session.is_algorithmic():
+	# (Do not extend algorithmic sessions and sessions from signed access tokens)
+	if not session.is_algorithmic() and not session.is_self_encoded():
 		session = await session_service.touch(session)
 
-	id_token = await oidc_service.issue_id_token(session)
+	id_token = await oidc_service.issue_id_token_cached(session, requested_tenant)
 
 	# Set the authorization header
 	headers = {
@@ -413,3 +415,97 @@ class ReverseSortingString(str):
 		return str.__lt__(self, other)
 	def __ge__(self, other):
 		return str.__le__(self, other)
+
+
+class TTLCache:
+	"""
+	Bounded in-memory key-value cache with entry expiration
+
+	Entries expire after a fixed time since they were stored. When the cache is full,
+	the least recently used entry is evicted to make space for the new one.
+	"""
+
+	def __init__(self, max_size: int, expiration: float):
+		"""
+		Args:
+			max_size: Maximum number of entries held in the cache.
+			expiration: Default entry validity period in seconds.
+		"""
+		assert max_size > 0
+		self.MaxSize = max_size
+		self.Expiration = expiration
+		self.Data: collections.OrderedDict = collections.OrderedDict()
+
+
+	def __len__(self):
+		return len(self.Data)
+
+
+	def get(self, key, default=None):
+		"""
+		Get a valid cached value or the default if the key is missing or expired.
+		"""
+		try:
+			value, expires_at = self.Data[key]
+		except KeyError:
+			return default
+		if expires_at < time.monotonic():
+			del self.Data[key]
+			return default
+		self.Data.move_to_end(key)
+		return value
+
+
+	def set(self, key, value, expiration: float | None = None):
+		"""
+		Store a value in the cache, evicting the least recently used entries if necessary.
+
+		Args:
+			key: Cache key.
+			value: Value to store.
+			expiration: Validity period in seconds. Defaults to the cache-wide expiration.
+		"""
+		if expiration is None:
+			expiration = self.Expiration
+		self.Data[key] = (value, time.monotonic() + expiration)
+		self.Data.move_to_end(key)
+		while len(self.Data) > self.MaxSize:
+			self.Data.popitem(last=False)
+
+
+	def delete(self, key):
+		"""
+		Remove the key from the cache if present.
+		"""
+		self.Data.pop(key, None)
+
+
+	def delete_matching(self, predicate: typing.Callable[[typing.Any, typing.Any], bool]) -> int:
+		"""
+		Remove all entries for which predicate(key, value) is true.
+
+		Returns:
+			Number of removed entries.
+		"""
+		to_delete = [key for key, (value, _) in self.Data.items() if predicate(key, value)]
+		for key in to_delete:
+			del self.Data[key]
+		return len(to_delete)
+
+
+	def delete_expired(self) -> int:
+		"""
+		Remove all expired entries. Expired entries are otherwise only removed when they are read or evicted.
+
+		Returns:
+			Number of removed entries.
+		"""
+		now = time.monotonic()
+		to_delete = [key for key, (_, expires_at) in self.Data.items() if expires_at < now]
+		for key in to_delete:
+			del self.Data[key]
+		return len(to_delete)
+
+
+	def clear(self):
+		self.Data.clear()
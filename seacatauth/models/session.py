@@ -185,6 +185,9 @@ class Session:
 		self.OAuth2 = self._deserialize_oauth2_data(session_dict)
 		self.Batman = self._deserialize_batman_data(session_dict)
 
+		# Set when the session is restored from a signed access token instead of the database
+		self.SelfEncoded = False
+
 		if len(session_dict) > 0:
 			self.Data = session_dict
 		else:
@@ -282,6 +285,12 @@ class Session:
 		"""
 		return self.SessionId == self.ALGORITHMIC_SESSION_ID
 
+	def is_self_encoded(self) -> bool:
+		"""
+		Is the session restored from a signed access token (i.e. without reading the database)?
+		"""
+		return self.SelfEncoded
+
 	def is_anonymous(self) -> bool:
 		"""
 		Is this session anonymous (guest session, without authentication)?
@@ -18,10 +18,12 @@ from ..generic import update_url_query_params
 from ..models import Session, const
 from .. import exceptions, AuditLogger, generic
 from . import pkce
-from ..authz import build_credentials_authz
+from .signed_access_token import SignedAccessTokenProvider
+from ..authz import CredentialsAuthzContext
 from ..session.builders import (
 	credentials_session_builder,
 	authz_session_builder,
+	totp_session_builder,
 )
 
 
@@ -100,6 +102,32 @@ class OpenIdConnectService(asab.Service):
 
 		self.JSONDumper = asab.web.rest.json.JSONDumper(pretty=False)
 
+		# Self-contained access tokens for clients with the "signed_access_token" attribute
+		self.SignedAccessTokens = SignedAccessTokenProvider(app, self.PrivateKey, self.Issuer)
+
+		# Introspection optimization.
+		# Cache maps (session ID, session version, tenant) to signed ID tokens.
+		self.IdTokenCacheLifetimeRatio = asab.Config.getfloat("openidconnect", "id_token_cache_lifetime_ratio")
+		if not (0 <= self.IdTokenCacheLifetimeRatio <= 1):
+			raise ValueError("OpenID Connect id_token_cache_lifetime_ratio must be a float between 0 and 1.")
+		if self.IdTokenCacheLifetimeRatio > 0:
+			self.IdTokenCache = generic.TTLCache(
+				max_size=asab.Config.getint("openidconnect", "id_token_cache_size"),
+				expiration=0)  # Validity period is set per token
+		else:
+			# Disable cache
+			self.IdTokenCache = None
+
+		self.MetricsService = app.get_service("asab.MetricsService")
+		self.IdTokenCacheCounter = self.MetricsService.create_counter(
+			"id_token_cache",
+			tags={"help": "Counts ID token cache hits and misses."},
+			init_values={"hit": 0, "miss": 0})
+
+
+	async def initialize(self, app):
+		await self.SignedAccessTokens.initialize(app)
+
 
 	async def refresh_session(
 		self,
@@ -144,14 +172,13 @@ class OpenIdConnectService(asab.Service):
 			exclude_resources = set()
 
 		# Authorize tenant
-		authz = await build_credentials_authz(
-			self.TenantService, self.RoleService, root_session.Credentials.Id,
-			tenants=None,
-			exclude_resources=exclude_resources
-		)
+		authz_context = CredentialsAuthzContext(
+			self.CredentialsService, self.TenantService, self.RoleService, root_session.Credentials.Id)
+		authz = await authz_context.get_authz(tenants=None, exclude_resources=exclude_resources)
 		authorized_tenant = await self.get_accessible_tenant_from_scope(
 			granted_scope, root_session.Credentials.Id,
-			has_access_to_all_tenants=self.RBACService.can_access_all_tenants(authz)
+			has_access_to_all_tenants=self.RBACService.can_access_all_tenants(authz),
+			user_tenants=await authz_context.get_tenants(),
 		)
 
 		session_builders = await self.SessionService.build_client_session(
@@ -161,6 +188,7 @@ class OpenIdConnectService(asab.Service):
 			tenants=[authorized_tenant] if authorized_tenant else None,
 			nonce=session.OAuth2.Nonce,
 			redirect_uri=session.OAuth2.RedirectUri,
+			authz_context=authz_context,
 		)
 
 		if expires_at:
@@ -244,8 +272,6 @@ class OpenIdConnectService(asab.Service):
 
 
 	async def build_userinfo(self, session):
-		otp_service = self.App.get_service("seacatauth.OTPService")
-
 		userinfo = {
 			"iss": self.Issuer,
 			"sub": session.Credentials.Id,  # The sub (subject) Claim MUST always be returned in the UserInfo Response.
@@ -311,11 +337,8 @@ class OpenIdConnectService(asab.Service):
 			userinfo["impersonator_sid"] = session.Authentication.ImpersonatorSessionId
 			userinfo["impersonator_cid"] = session.Authentication.ImpersonatorCredentialsId
 
-		try:
-			if await otp_service.has_activated_totp(session.Credentials.Id):
-				userinfo["totp_set"] = True
-		except exceptions.CredentialsNotFoundError:
-			pass
+		if session.Authentication.TOTPSet:
+			userinfo["totp_set"] = True
 
 		if session.Authentication.AvailableFactors is not None:
 			userinfo["available_factors"] = session.Authentication.AvailableFactors
@@ -379,6 +402,40 @@ class OpenIdConnectService(asab.Service):
 		return id_token
 
 
+	async def issue_id_token_cached(self, session, tenant: str | None = None):
+		"""
+		Issue an ID token for session introspection.
+		The signed token is reused as long as the session does not change,
+		until a configured fraction of its lifetime has elapsed.
+		Sessions restored from signed access tokens are not cached.
+
+		Args:
+			session: Introspected session.
+			tenant: Tenant requested in introspection.
+
+		Returns:
+			Serialized ID token
+		"""
+		if self.IdTokenCache is None or session.Session.Expiration is None:
+			return await self.issue_id_token(session)
+		if session.is_self_encoded() or session.Session.Version is None:
+			# Sessions restored from signed access tokens have no version to tell their tokens apart
+			return await self.issue_id_token(session)
+
+		cache_key = (session.SessionId, session.Session.Version, tenant)
+		id_token = self.IdTokenCache.get(cache_key)
+		if id_token is not None:
+			self.IdTokenCacheCounter.add("hit", 1)
+			return id_token
+
+		self.IdTokenCacheCounter.add("miss", 1)
+		id_token = await self.issue_id_token(session)
+		lifetime = (session.Session.Expiration - datetime.datetime.now(datetime.timezone.utc)).total_seconds()
+		if lifetime > 0:
+			self.IdTokenCache.set(cache_key, id_token, expiration=lifetime * self.IdTokenCacheLifetimeRatio)
+		return id_token
+
+
 	async def authorize_tenants_by_scope(self, scope, session, client_id):
 		has_access_to_all_tenants = self.RBACService.has_resource_access(
 			session.Authorization.Authz, tenant=None, requested_resources=[ResourceId.SUPERUSER]) \
@@ -428,14 +485,15 @@ class OpenIdConnectService(asab.Service):
 		self,
 		scope: typing.Iterable,
 		credentials_id: str,
-		has_access_to_all_tenants: bool = False
+		has_access_to_all_tenants: bool = False,
+		user_tenants: typing.Optional[list] = None,
 	) -> typing.Optional[str]:
 		"""
 		Extract tenants from requested scope and return the first accessible one.
 		"""
 		try:
 			tenants: set = await self.TenantService.get_tenants_by_scope(
-				scope, credentials_id, has_access_to_all_tenants)
+				scope, credentials_id, has_access_to_all_tenants, user_tenants=user_tenants)
 		except exceptions.TenantNotFoundError as e:
 			L.error("Tenant not found.", struct_data={"tenant": e.Tenant})
 			raise exceptions.AccessDeniedError(subject=credentials_id)
@@ -465,6 +523,11 @@ class OpenIdConnectService(asab.Service):
 		access_token_expiration = client.get("session_expiration") or AccessToken.Expiration
 		access_token_expires_at = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(
 			seconds=access_token_expiration)
+		if client.get("signed_access_token"):
+			# Signed access tokens are short-lived, since they cannot be revoked for longer
+			access_token_expires_at = min(
+				access_token_expires_at,
+				datetime.datetime.now(datetime.timezone.utc) + self.SignedAccessTokens.MaxExpiration)
 
 		if access_token_expires_at > sso_session.Session.MaxExpiration:
 			# Maximum session lifetime reached, there will be no refresh token
@@ -526,13 +589,19 @@ class OpenIdConnectService(asab.Service):
 		"""
 		Create OAuth2 access token
 
+		Clients with the "signed_access_token" attribute receive a self-contained signed JWT instead of an opaque
+		token, unless the requested expiration exceeds the maximum lifetime of signed access tokens.
+
 		Args:
 			session: Client session
 			expires_at: Token expiration time
 
 		Returns:
-			Base64-encoded token value
+			Base64-encoded token value or signed JWT
 		"""
+		if not session.is_algorithmic() and await self._use_signed_access_token(session, expires_at):
+			return self.SignedAccessTokens.serialize(session, expires_at)
+
 		raw_value = await self.TokenService.create(
 			token_length=AccessToken.ByteLength,
 			token_type=AccessToken.TokenType,
@@ -543,6 +612,19 @@ class OpenIdConnectService(asab.Service):
 		return base64.urlsafe_b64encode(raw_value).decode("ascii")
 
 
+	async def _use_signed_access_token(self, session: Session, expires_at: datetime.datetime) -> bool:
+		if session.Batman is not None:
+			# Batman introspection needs the Basic auth token, which is never put into signed access tokens
+			return False
+		if expires_at > datetime.datetime.now(datetime.timezone.utc) + self.SignedAccessTokens.MaxExpiration:
+			return False
+		try:
+			client = await self.ClientService.get_client(session.OAuth2.ClientId)
+		except KeyError:
+			return False
+		return bool(client.get("signed_access_token"))
+
+
 	async def create_refresh_token(
 		self,
 		session: Session,
@@ -600,7 +682,11 @@ class OpenIdConnectService(asab.Service):
 		Retrieve session by its access token.
 		"""
 		if "." in token_value:
-			# If there is ".", the value is not pure base64. It must be a JWT of an algorithmic session.
+			# If there is ".", the value is not pure base64. It must be a JWT.
+			if self.SignedAccessTokens.is_signed_access_token(token_value):
+				# Self-contained access token, verified without database lookup
+				return self.SignedAccessTokens.deserialize(token_value)
+			# JWT of an algorithmic session
 			return await self.SessionService.Algorithmic.deserialize(token_value)
 
 		try:
@@ -615,12 +701,11 @@ class OpenIdConnectService(asab.Service):
 			raise exceptions.SessionNotFoundError("Corrupt access token format") from e
 
 		try:
-			token_data = await self.TokenService.get(token_bytes, token_type=AccessToken.TokenType)
+			token_data, session = await self.SessionService.get_by_auth_token(
+				token_bytes, token_type=AccessToken.TokenType)
 		except KeyError:
 			raise exceptions.SessionNotFoundError("Invalid or expired access token")
-		try:
-			session = await self.SessionService.get(token_data["sid"])
-		except KeyError:
+		if session is None:
 			L.error("Integrity error: Access token points to a nonexistent session.", struct_data={
 				"sid": token_data["sid"]})
 			await self.TokenService.delete(token_bytes)
@@ -650,12 +735,11 @@ class OpenIdConnectService(asab.Service):
 			raise exceptions.SessionNotFoundError("Corrupt refresh token format") from e
 
 		try:
-			token_data = await self.TokenService.get(token_bytes, token_type=RefreshToken.TokenType)
+			token_data, session = await self.SessionService.get_by_auth_token(
+				token_bytes, token_type=RefreshToken.TokenType)
 		except KeyError:
 			raise exceptions.SessionNotFoundError("Invalid or expired refresh token")
-		try:
-			session = await self.SessionService.get(token_data["sid"])
-		except KeyError:
+		if session is None:
 			L.error("Integrity error: Refresh token points to a nonexistent session.", struct_data={
 				"sid": token_data["sid"]})
 			await self.TokenService.delete(token_bytes)
@@ -685,6 +769,7 @@ class OpenIdConnectService(asab.Service):
 		credentials_service = self.App.get_service("seacatauth.CredentialsService")
 		tenant_service = self.App.get_service("seacatauth.TenantService")
 		role_service = self.App.get_service("seacatauth.RoleService")
+		otp_service = self.App.get_service("seacatauth.OTPService")
 
 		if expiration is None:
 			expiration = self.ClientCredentialsGrantExpiration
@@ -709,13 +794,18 @@ class OpenIdConnectService(asab.Service):
 				scope=scope,
 			)
 
+		# Credentials, tenants and authorization are fetched once and shared by the checks and builders below
+		authz_context = CredentialsAuthzContext(
+			credentials_service, tenant_service, role_service, credentials_id, credentials=credentials)
+
 		# Authorize access to tenants requested in scope
-		global_authz = await build_credentials_authz(
-			self.TenantService, self.RoleService, credentials_id)
+		global_authz = await authz_context.get_authz()
 		has_access_to_all_tenants = self.RBACService.can_access_all_tenants(global_authz)
 		try:
 			authorized_tenant = await self.get_accessible_tenant_from_scope(
-				scope, credentials_id, has_access_to_all_tenants)
+				scope, credentials_id, has_access_to_all_tenants,
+				user_tenants=await authz_context.get_tenants(),
+			)
 
 		except exceptions.NoTenantsError:
 			raise exceptions.OAuth2InvalidScope(
@@ -737,12 +827,15 @@ class OpenIdConnectService(asab.Service):
 
 		# Create session
 		session_builders = [
-			await credentials_session_builder(credentials_service, credentials_id, scope),
+			await credentials_session_builder(
+				credentials_service, credentials_id, scope, authz_context=authz_context),
+			await totp_session_builder(otp_service, credentials_id),
 			await authz_session_builder(
 				tenant_service=tenant_service,
 				role_service=role_service,
 				credentials_id=credentials_id,
 				tenants=[authorized_tenant] if authorized_tenant else None,
+				authz_context=authz_context,
 			),
 			[
 				(Session.FN.Session.Label, label),
@@ -0,0 +1,226 @@
+import base64
+import binascii
+import datetime
+import json
+import logging
+import typing
+import uuid
+import asab
+import asab.web.rest
+import jwcrypto.jwt
+import jwcrypto.jws
+import pymongo
+
+from ..models import Session
+from .. import exceptions
+
+
+L = logging.getLogger(__name__)
+
+
+class SignedAccessTokenProvider:
+	"""
+	Issue and verify self-contained access tokens (JWT profile for OAuth 2.0 access tokens, RFC 9068).
+
+	The token carries the client session data needed for introspection, so it can be introspected without
+	a database lookup. The token is signed, not encrypted: it must not carry any personal or login details.
+	Sessions that are deleted before their tokens expire are recorded in a shared revocation collection,
+	which every instance loads at startup and polls every minute. Sessions deleted by this instance
+	(the "Session.deleted!" PubSub message) are revoked locally at once.
+	"""
+
+	TokenType = "at+jwt"
+	RevocationCollection = "sar"
+
+	def __init__(self, app, private_key, issuer: str):
+		self.App = app
+		self.PrivateKey = private_key
+		self.Issuer = issuer
+		self.JSONDumper = asab.web.rest.json.JSONDumper(pretty=False)
+		self.StorageService = app.get_service("asab.StorageService")
+		self.TaskService = app.get_service("asab.TaskService")
+		self.MaxExpiration = datetime.timedelta(
+			seconds=asab.Config.getseconds("openidconnect", "signed_access_token_expiration"))
+
+		# Maps IDs of deleted sessions to the time when their last signed token expires
+		self.RevokedSessions: typing.Dict[str, datetime.datetime] = {}
+
+		self.MetricsService = app.get_service("asab.MetricsService")
+		self.TokenCounter = self.MetricsService.create_counter(
+			"signed_access_tokens",
+			tags={"help": "Counts issued signed access tokens and the results of their verification."},
+			init_values={"issued": 0, "valid": 0, "invalid": 0, "revoked": 0})
+		self.RevokedSessionsGauge = self.MetricsService.create_gauge(
+			"signed_access_token_revocations",
+			tags={"help": "Number of sessions in the signed access token revocation list."},
+			init_values={"sessions": 0})
+
+		app.PubSub.subscribe("Session.deleted!", self._on_session_deleted)
+		app.PubSub.subscribe("Application.tick/60!", self._on_tick_sync)
+
+
+	async def initialize(self, app):
+		collection = await self.StorageService.collection(self.RevocationCollection)
+		# Revocations are deleted by the database once the last token of the session expires
+		try:
+			await collection.create_index([("exp", pymongo.ASCENDING)], expireAfterSeconds=0)
+		except Exception as e:
+			L.error("Failed to create TTL index (expiration): {}".format(e), struct_data={
+				"collection": self.RevocationCollection})
+		await self._load_revocations()
+
+
+	def is_signed_access_token(self, token_value: str) -> bool:
+		"""
+		Check the JOSE header to tell signed access tokens apart from other JWTs (e.g. algorithmic sessions).
+		The signature is not verified here.
+		"""
+		header = token_value.split(".", 1)[0]
+		try:
+			header = json.loads(base64.urlsafe_b64decode(header + "=" * (-len(header) % 4)))
+		except (binascii.Error, ValueError):
+			return False
+		return isinstance(header, dict) and header.get("typ") == self.TokenType
+
+
+	def serialize(self, session: Session, expires_at: datetime.datetime) -> str:
+		"""
+		Build a signed access token from the client session.
+
+		Args:
+			session: Client session
+			expires_at: Token expiration time, must not exceed the configured maximum
+
+		Returns:
+			Serialized JWT
+		"""
+		now = datetime.datetime.now(datetime.timezone.utc)
+		assert expires_at <= now + self.MaxExpiration
+
+		payload = {
+			"iss": self.Issuer,
+			"sub": session.Credentials.Id,
+			"client_id": session.OAuth2.ClientId,
+			"sid": str(session.SessionId),
+			"scope": " ".join(session.OAuth2.Scope or []),
+			"authz": session.Authorization.Authz,
+			"tenants": session.Authorization.AssignedTenants,
+			"iat": int(now.timestamp()),
+			"exp": int(expires_at.timestamp()),
+			"jti": uuid.uuid4().hex,
+		}
+		if session.TrackId is not None:
+			payload["track_id"] = session.TrackId.hex()
+
+		header = {
+			"alg": "ES256",
+			"typ": self.TokenType,
+			"kid": self.PrivateKey.key_id,
+		}
+		token = jwcrypto.jwt.JWT(
+			header=header,
+			claims=self.JSONDumper(payload)
+		)
+		token.make_signed_token(self.PrivateKey)
+		self.TokenCounter.add("issued", 1)
+		return token.serialize()
+
+
+	def deserialize(self, token_value: str) -> Session:
+		"""
+		Verify the signed access token and rebuild the client session from its claims.
+		"""
+		try:
+			token = jwcrypto.jwt.JWT(jwt=token_value, key=self.PrivateKey)
+		except (ValueError, jwcrypto.jws.InvalidJWSObject) as e:
+			L.error("Corrupt signed access token.")
+			self.TokenCounter.add("invalid", 1)
+			raise exceptions.SessionNotFoundError("Corrupt signed access token.") from e
+		except jwcrypto.jws.InvalidJWSSignature as e:
+			L.error("Invalid signed access token signature.")
+			self.TokenCounter.add("invalid", 1)
+			raise exceptions.SessionNotFoundError("Invalid signed access token signature.") from e
+		except jwcrypto.jwt.JWTExpired as e:
+			self.TokenCounter.add("invalid", 1)
+			raise exceptions.SessionNotFoundError("Expired signed access token.") from e
+
+		claims = json.loads(token.claims)
+		if claims["sid"] in self.RevokedSessions:
+			self.TokenCounter.add("revoked", 1)
+			raise exceptions.SessionNotFoundError("Signed access token belongs to a deleted session.")
+
+		issued_at = datetime.datetime.fromtimestamp(claims["iat"], datetime.timezone.utc)
+		session_dict = {
+			Session.FN.SessionId: claims["sid"],
+			Session.FN.Version: None,
+			Session.FN.CreatedAt: issued_at,
+			Session.FN.ModifiedAt: issued_at,
+			Session.FN.Session.Expiration: datetime.datetime.fromtimestamp(claims["exp"], datetime.timezone.utc),
+			Session.FN.Credentials.Id: claims["sub"],
+			Session.FN.OAuth2.ClientId: claims["client_id"],
+			Session.FN.OAuth2.Scope: claims["scope"].split(" ") if claims["scope"] else [],
+			Session.FN.Authorization.Authz: claims["authz"],
+			Session.FN.Authorization.AssignedTenants: claims.get("tenants"),
+		}
+		if claims.get("track_id") is not None:
+			session_dict[Session.FN.Session.TrackId] = bytes.fromhex(claims["track_id"])
+
+		try:
+			session = Session(session_dict)
+		except Exception as e:
+			L.error("Failed to build session from signed access token claims.", struct_data={"sid": claims["sid"]})
+			self.TokenCounter.add("invalid", 1)
+			raise exceptions.SessionNotFoundError(
+				"Failed to build session from signed access token claims.") from e
+
+		session.SelfEncoded = True
+		self.TokenCounter.add("valid", 1)
+		return session
+
+
+	def _on_session_deleted(self, event_name, session_ids):
+		revoked_until = datetime.datetime.now(datetime.timezone.utc) + self.MaxExpiration
+		session_ids = [str(session_id) for session_id in session_ids]
+		for session_id in session_ids:
+			self.RevokedSessions[session_id] = revoked_until
+		self.RevokedSessionsGauge.set("sessions", len(self.RevokedSessions))
+		# Let the other instances know
+		self.TaskService.schedule(self._store_revocations(session_ids, revoked_until))
+
+
+	def _on_tick_sync(self, event_name):
+		self.TaskService.schedule(self._load_revocations())
+
+
+	async def _store_revocations(self, session_ids: typing.List[str], revoked_until: datetime.datetime):
+		collection = self.StorageService.Database[self.RevocationCollection]
+		try:
+			await collection.bulk_write([
+				pymongo.UpdateOne({"_id": session_id}, {"$set": {"exp": revoked_until}}, upsert=True)
+				for session_id in session_ids
+			], ordered=False)
+		except Exception as e:
+			L.error("Failed to store signed access token revocations: {}".format(e), struct_data={
+				"count": len(session_ids)})
+
+
+	async def _load_revocations(self):
+		"""
+		Replace the revocation list with the revocations stored by all instances.
+		Unexpired local revocations are kept, since they may not have been stored yet.
+		"""
+		now = datetime.datetime.now(datetime.timezone.utc)
+		collection = self.StorageService.Database[self.RevocationCollection]
+		revoked_sessions = {}
+		try:
+			async for revocation in collection.find({"exp": {"$gt": now}}):
+				revoked_sessions[revocation["_id"]] = revocation["exp"].replace(tzinfo=datetime.timezone.utc)
+		except Exception as e:
+			L.error("Failed to load signed access token revocations: {}".format(e))
+			revoked_sessions = {}
+
+		for session_id, revoked_until in self.RevokedSessions.items():
+			if revoked_until > now:
+				revoked_sessions.setdefault(session_id, revoked_until)
+		self.RevokedSessions = revoked_sessions
+		self.RevokedSessionsGauge.set("sessions", len(self.RevokedSessions))
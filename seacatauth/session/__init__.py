@@ -6,6 +6,7 @@ from .builders import cookie_session_builder
 from .builders import authentication_session_builder
 from .builders import available_factors_session_builder
 from .builders import external_login_session_builder
+from .builders import totp_session_builder
 
 __all__ = [
 	"SessionService",
@@ -16,4 +17,5 @@ __all__ = [
 	"authentication_session_builder",
 	"available_factors_session_builder",
 	"external_login_session_builder",
+	"totp_session_builder",
 ]
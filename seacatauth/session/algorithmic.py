@@ -1,17 +1,17 @@
 import logging
-import typing
 import jwcrypto.jwt
 import jwcrypto.jws
 import jwcrypto.jwk
 import uuid
 import json
 import datetime
+import time
 import asab.web.rest
 import asab.metrics
 
 from ..models import Session
-from .. import exceptions
-from ..authz import build_credentials_authz
+from .. import exceptions, generic
+from ..authz import build_credentials_authz_bulk
 
 
 L = logging.getLogger(__name__)
@@ -39,15 +39,56 @@ class AlgorithmicSessionProvider:
 
 		# Database request optimization.
 		# Maps (credentials_id, scope) to available_tenants and authz.
-		self.AuthzCache: typing.Dict[typing.Tuple[str, frozenset], dict] = {}
-		self.AuthzCacheExpiration = datetime.timedelta(
-			seconds=asab.Config.getseconds("seacatauth:session", "algo_cache_expiration"))
+		self.AuthzCache = generic.TTLCache(
+			max_size=asab.Config.getint("seacatauth:session", "algo_cache_size"),
+			expiration=asab.Config.getseconds("seacatauth:session", "algo_cache_expiration"))
+		self.AuthzCacheCounter: asab.metrics.Counter = self.MetricsService.create_counter(
+			"algorithmic_authz_cache",
+			tags={"help": "Counts algorithmic session authorization cache hits and misses."},
+			init_values={"hit": 0, "miss": 0})
 
 		self.AnonymousSessionCounter: asab.metrics.Counter = self.MetricsService.create_counter(
 			"anonymous_sessions",
 			tags={"help": "Number of anonymous sessions created."},
 			init_values={"sessions": 0})
 
+		# Introspection optimization.
+		# Maps raw algorithmic session tokens to the session data built from their verified claims.
+		token_cache_expiration = asab.Config.getseconds("seacatauth:session", "algo_token_cache_expiration")
+		if token_cache_expiration > 0:
+			self.TokenCache = generic.TTLCache(
+				max_size=asab.Config.getint("seacatauth:session", "algo_token_cache_size"),
+				expiration=token_cache_expiration)
+		else:
+			# Disable cache
+			self.TokenCache = None
+
+		self.TokenCacheCounter: asab.metrics.Counter = self.MetricsService.create_counter(
+			"algorithmic_session_cache",
+			tags={"help": "Counts algorithmic session token cache hits and misses."},
+			init_values={"hit": 0, "miss": 0})
+
+		self.CacheSizeGauge = self.MetricsService.create_gauge(
+			"algorithmic_session_cache_size",
+			tags={"help": "Number of entries in algorithmic session caches."},
+			init_values={"authz": 0, "token": 0})
+
+		app.PubSub.subscribe("Application.tick/60!", self._on_tick_sweep)
+
+		# Authorization of the anonymous credentials has changed
+		app.PubSub.subscribe("Role.assigned!", self._on_credentials_authz_change)
+		app.PubSub.subscribe("Role.unassigned!", self._on_credentials_authz_change)
+		app.PubSub.subscribe("Tenant.assigned!", self._on_credentials_authz_change)
+		app.PubSub.subscribe("Tenant.unassigned!", self._on_credentials_authz_change)
+		app.PubSub.subscribe("Credentials.updated!", self._on_credentials_authz_change)
+		app.PubSub.subscribe("Credentials.deleted!", self._on_credentials_authz_change)
+
+		# Changes that may affect any credentials
+		app.PubSub.subscribe("Role.updated!", self._on_global_authz_change)
+		app.PubSub.subscribe("Role.deleted!", self._on_global_authz_change)
+		app.PubSub.subscribe("Tenant.deleted!", self._on_global_authz_change)
+		app.PubSub.subscribe("Resource.deleted!", self._on_global_authz_change)
+
 
 	async def initialize(self, app):
 		self.ClientService = app.get_service("seacatauth.ClientService")
@@ -68,6 +109,14 @@ class AlgorithmicSessionProvider:
 		self, created_at, track_id, client_dict, scope,
 		redirect_uri: str = None
 	) -> Session:
+		session_dict = await self._build_anonymous_session_dict(created_at, track_id, client_dict, scope, redirect_uri)
+		return Session(session_dict)
+
+
+	async def _build_anonymous_session_dict(
+		self, created_at, track_id, client_dict, scope,
+		redirect_uri: str = None
+	) -> dict:
 		session_dict = {
 			Session.FN.SessionId: Session.ALGORITHMIC_SESSION_ID,
 			Session.FN.Version: None,
@@ -80,28 +129,30 @@ class AlgorithmicSessionProvider:
 			Session.FN.Authentication.IsAnonymous: True,
 		}
 		await self._add_session_authz(session_dict, client_dict["anonymous_cid"], scope)
-		return Session(session_dict)
+		return session_dict
 
 
 	async def _add_session_authz(self, session_dict: dict, credentials_id: str, scope: set):
 		"""
 		Updates the session dict with tenant and resource authorization based on scope.
 		"""
-		data = self.AuthzCache.get((credentials_id, frozenset(scope)))
-		if data and datetime.datetime.now(datetime.timezone.utc) < data["exp"]:
+		cache_key = (credentials_id, frozenset(scope))
+		data = self.AuthzCache.get(cache_key)
+		if data is not None:
+			self.AuthzCacheCounter.add("hit", 1)
 			available_tenants = data["available_tenants"]
 			authz = data["authz"]
 		else:
+			self.AuthzCacheCounter.add("miss", 1)
 			available_tenants = await self.TenantService.get_tenants(credentials_id)
 			requested_tenants = await self.TenantService.get_tenants_by_scope(
 				scope, credentials_id)
-			authz = await build_credentials_authz(
+			authz = await build_credentials_authz_bulk(
 				self.TenantService, self.RoleService, credentials_id, requested_tenants)
-			self.AuthzCache[(credentials_id, frozenset(scope))] = {
-				"exp": datetime.datetime.now(datetime.timezone.utc) + self.AuthzCacheExpiration,
+			self.AuthzCache.set(cache_key, {
 				"available_tenants": available_tenants,
 				"authz": authz
-			}
+			})
 
 		session_dict[Session.FN.Authorization.AssignedTenants] = available_tenants
 		session_dict[Session.FN.Authorization.Authz] = authz
@@ -110,7 +161,16 @@ class AlgorithmicSessionProvider:
 	async def deserialize(self, token_value) -> Session | None:
 		"""
 		Parse JWT token and build a SessionAdapter using the token data.
+		Repeated tokens are served from cache, skipping signature verification and session building.
 		"""
+		if self.TokenCache is not None:
+			session_dict = self.TokenCache.get(token_value)
+			if session_dict is not None:
+				self.TokenCacheCounter.add("hit", 1)
+				# Session object consumes the dict
+				return Session(dict(session_dict))
+			self.TokenCacheCounter.add("miss", 1)
+
 		try:
 			token = jwcrypto.jwt.JWT(jwt=token_value, key=self.PrivateKey)
 		except (ValueError, jwcrypto.jws.InvalidJWSObject) as e:
@@ -125,7 +185,7 @@ class AlgorithmicSessionProvider:
 		data_dict = json.loads(token.claims)
 		client_dict = await self.ClientService.get_client(data_dict["azp"])
 		try:
-			session = await self._build_anonymous_session(
+			session_dict = await self._build_anonymous_session_dict(
 				created_at=datetime.datetime.fromtimestamp(data_dict["iat"], datetime.timezone.utc),
 				track_id=uuid.UUID(data_dict["track_id"]).bytes,
 				client_dict=client_dict,
@@ -136,7 +196,14 @@ class AlgorithmicSessionProvider:
 			raise exceptions.SessionNotFoundError(
 				"Failed to build session from algorithmic session token claims.") from e
 
-		return session
+		if self.TokenCache is not None:
+			expiration = self.TokenCache.Expiration
+			if "exp" in data_dict:
+				expiration = min(expiration, data_dict["exp"] - time.time())
+			if expiration > 0:
+				self.TokenCache.set(token_value, dict(session_dict), expiration=expiration)
+
+		return Session(session_dict)
 
 
 	def serialize(self, session: Session) -> str:
@@ -163,3 +230,33 @@ class AlgorithmicSessionProvider:
 		token.make_signed_token(self.PrivateKey)
 		id_token = token.serialize()
 		return id_token
+
+
+	def _on_tick_sweep(self, event_name):
+		self.AuthzCache.delete_expired()
+		if self.TokenCache is not None:
+			self.TokenCache.delete_expired()
+		self._update_cache_size_metric()
+
+
+	def _on_credentials_authz_change(self, event_name, credentials_id=None, **kwargs):
+		if credentials_id is None:
+			self._on_global_authz_change(event_name)
+			return
+		self.AuthzCache.delete_matching(lambda key, value: key[0] == credentials_id)
+		if self.TokenCache is not None:
+			self.TokenCache.delete_matching(
+				lambda key, value: value.get(Session.FN.Credentials.Id) == credentials_id)
+		self._update_cache_size_metric()
+
+
+	def _on_global_authz_change(self, event_name, **kwargs):
+		self.AuthzCache.clear()
+		if self.TokenCache is not None:
+			self.TokenCache.clear()
+		self._update_cache_size_metric()
+
+
+	def _update_cache_size_metric(self):
+		self.CacheSizeGauge.set("authz", len(self.AuthzCache))
+		self.CacheSizeGauge.set("token", len(self.TokenCache) if self.TokenCache is not None else 0)
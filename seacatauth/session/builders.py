@@ -3,15 +3,18 @@ import secrets
 import datetime
 
 from ..models import Session
-from ..authz import build_credentials_authz
+from ..authz import build_credentials_authz_bulk
 
 
 L = logging.getLogger(__name__)
 
 
-async def credentials_session_builder(credentials_service, credentials_id, scope=None):
+async def credentials_session_builder(credentials_service, credentials_id, scope=None, authz_context=None):
 	scope = scope or frozenset()
-	credentials = await credentials_service.get(credentials_id, include=["__totp"])
+	if authz_context is not None:
+		credentials = await authz_context.get_credentials()
+	else:
+		credentials = await credentials_service.get(credentials_id)
 	data = [
 		(Session.FN.Credentials.Id, credentials_id),
 		(Session.FN.Credentials.CreatedAt, credentials.get("_c")),
@@ -29,11 +32,14 @@ async def credentials_session_builder(credentials_service, credentials_id, scope
 		data.append((Session.FN.Credentials.Phone, credentials.get("phone")))
 	if "profile" in scope or "userinfo:data" in scope or "userinfo:*" in scope:
 		data.append((Session.FN.Credentials.CustomData, credentials.get("data")))
-	if "profile" in scope or "userinfo:authn" in scope or "userinfo:*" in scope:
-		data.append((Session.FN.Authentication.TOTPSet, credentials.get("__totp") not in (None, "")))
 	return data
 
 
+async def totp_session_builder(otp_service, credentials_id):
+	totp_set = await otp_service.has_activated_totp(credentials_id)
+	return ((Session.FN.Authentication.TOTPSet, totp_set),)
+
+
 async def external_login_session_builder(external_credentials_service, credentials_id):
 	external_logins = {}
 	for result in await external_credentials_service.list_ext_credentials(credentials_id):
@@ -47,15 +53,22 @@ async def external_login_session_builder(external_credentials_service, credentia
 
 async def authz_session_builder(
 	tenant_service, role_service, credentials_id,
-	tenants=None, exclude_resources=None
+	tenants=None, exclude_resources=None, authz_context=None
 ):
 	"""
 	Add 'authz' dict with currently authorized tenants and their resources
 	Add 'tenants' list with complete list of credential's tenants
+	Reuse the data already fetched in this request if `authz_context` is given.
 	"""
 	tenants = tenants or []
-	authz = await build_credentials_authz(tenant_service, role_service, credentials_id, tenants, exclude_resources)
-	user_tenants = list(set(await tenant_service.get_tenants(credentials_id)).union(tenants))
+	if authz_context is not None:
+		authz = await authz_context.get_authz(tenants, exclude_resources)
+		user_tenants = await authz_context.get_tenants()
+	else:
+		authz = await build_credentials_authz_bulk(
+			tenant_service, role_service, credentials_id, tenants, exclude_resources)
+		user_tenants = await tenant_service.get_tenants(credentials_id)
+	user_tenants = list(set(user_tenants).union(tenants))
 	return (
 		(Session.FN.Authorization.Authz, authz),
 		(Session.FN.Authorization.AssignedTenants, user_tenants),
@@ -30,6 +30,7 @@ class SessionHandler(object):
 		web_app.router.add_delete("/sessions", self.delete_all)
 		web_app.router.add_get("/sessions/{credentials_id}", self.search_by_credentials_id)
 		web_app.router.add_delete("/sessions/{credentials_id}", self.delete_by_credentials_id)
+		web_app.router.add_get("/sessions/revocation/{job_id}", self.revocation_job_detail)
 
 		web_app.router.add_delete("/account/sessions", self.delete_own_sessions)
 
@@ -102,13 +103,16 @@ class SessionHandler(object):
 	async def delete_all(self, request):
 		"""
 		Terminate all sessions
+
+		Large revocations continue in the background. The response then has status 202 and contains
+		a job ID for checking the progress.
 		"""
 		authz = asab.contextvars.Authz.get()
 		L.warning("Deleting all sessions", struct_data={
 			"requested_by": authz.CredentialsId
 		})
-		await self.SessionService.delete_all_sessions()
-		return asab.web.rest.json_response(request, {"result": "OK"})
+		job = await self.SessionService.revoke_sessions()
+		return self._revocation_response(request, job)
 
 
 	@asab.web.tenant.allow_no_tenant
@@ -144,6 +148,9 @@ class SessionHandler(object):
 	async def delete_by_credentials_id(self, request):
 		"""
 		Terminate all sessions of given credentials
+
+		Large revocations continue in the background. The response then has status 202 and contains
+		a job ID for checking the progress.
 		"""
 		authz = asab.contextvars.Authz.get()
 		credentials_id = request.match_info.get("credentials_id")
@@ -151,8 +158,30 @@ class SessionHandler(object):
 			"cid": credentials_id,
 			"requested_by": authz.CredentialsId,
 		})
-		await self.SessionService.delete_sessions_by_credentials_id(credentials_id)
-		return asab.web.rest.json_response(request, {"result": "OK"})
+		job = await self.SessionService.revoke_sessions(query_filter={
+			Session.FN.Credentials.Id: credentials_id
+		})
+		return self._revocation_response(request, job)
+
+
+	@asab.web.tenant.allow_no_tenant
+	@asab.web.auth.require(ResourceId.SESSION_TERMINATE)
+	async def revocation_job_detail(self, request):
+		"""
+		Get the progress of a background session revocation
+		"""
+		job_id = request.match_info["job_id"]
+		try:
+			job = await self.SessionService.get_revocation_job(job_id)
+		except KeyError:
+			return asab.web.rest.json_response(request, {"result": "NOT-FOUND"}, status=404)
+		return asab.web.rest.json_response(request, job)
+
+
+	def _revocation_response(self, request, job: dict):
+		if job["state"] == "running":
+			return asab.web.rest.json_response(request, {"result": "ACCEPTED", "job": job}, status=202)
+		return asab.web.rest.json_response(request, {"result": "OK", "job": job})
 
 
 	@asab.web.tenant.allow_no_tenant
@@ -1,6 +1,8 @@
+import asyncio
 import base64
 import datetime
 import logging
+import time
 import typing
 import uuid
 import bson
@@ -15,7 +17,7 @@ import pymongo
 
 from ..api import local_authz
 from ..models.const import ResourceId
-from .. import exceptions
+from .. import exceptions, generic
 from ..events import EventTypes
 from ..models import Session
 from ..models.session import rest_get
@@ -28,7 +30,8 @@ from .builders import (
 	authentication_session_builder,
 	available_factors_session_builder,
 	external_login_session_builder,
-	cookie_session_builder
+	cookie_session_builder,
+	totp_session_builder,
 )
 
 
@@ -37,6 +40,7 @@ L = logging.getLogger(__name__)
 
 class SessionService(asab.Service):
 	SessionCollection = "s"
+	RevocationJobCollection = "srj"
 
 	def __init__(self, app, service_name="seacatauth.SessionService"):
 		super().__init__(app, service_name)
@@ -88,13 +92,71 @@ class SessionService(asab.Service):
 		touch_cooldown = asab.Config.getseconds("seacatauth:session", "touch_cooldown")
 		self.TouchCooldown = datetime.timedelta(seconds=touch_cooldown)
 
+		# Database request optimization.
+		# Cache maps session IDs to decrypted session dicts.
+		# CacheIndex maps (identifier field, hashed identifier value) to session IDs.
+		cache_expiration = asab.Config.getseconds("seacatauth:session", "cache_expiration")
+		if cache_expiration > 0:
+			cache_size = asab.Config.getint("seacatauth:session", "cache_size")
+			self.Cache = generic.TTLCache(max_size=cache_size, expiration=cache_expiration)
+			self.CacheIndex = generic.TTLCache(max_size=cache_size, expiration=cache_expiration)
+		else:
+			# Disable cache
+			self.Cache = None
+			self.CacheIndex = None
+
+		# Write-behind session touches
+		# PendingTouches maps session IDs to the latest requested expiration (or None if not extended).
+		self.TouchFlushInterval = asab.Config.getseconds("seacatauth:session", "touch_flush_interval")
+		self.PendingTouches = {}
+		self.LastTouchFlush = time.monotonic()
+		if self.TouchFlushInterval > 0:
+			app.PubSub.subscribe("Application.tick!", self._on_tick_flush_touches)
+
+		# Expired session purge
+		self.PurgeBatchSize = asab.Config.getint("seacatauth:session", "purge_batch_size")
+		self.PurgeTimeBudget = asab.Config.getseconds("seacatauth:session", "purge_time_budget")
+		self.PurgePending = False
+		self.PurgeRunning = False
+
+		# Bulk session revocation
+		self.RevocationBatchSize = asab.Config.getint("seacatauth:session", "revocation_batch_size")
+		self.RevocationBackgroundThreshold = asab.Config.getint(
+			"seacatauth:session", "revocation_background_threshold")
+		# Jobs are stored in the database so that any instance can report their progress.
+		# They are kept for one hour after their last progress update.
+		self.RevocationJobExpiration = datetime.timedelta(hours=1)
+
 		app.PubSub.subscribe("Application.housekeeping!", self._on_housekeeping)
+		app.PubSub.subscribe("Application.tick/60!", self._on_tick_purge)
+		app.PubSub.subscribe("TOTP.activated!", self._on_totp_change)
+		app.PubSub.subscribe("TOTP.deactivated!", self._on_totp_change)
 
 		# Metrics
 		self.MetricsService = app.get_service("asab.MetricsService")
 		self.TaskService = app.get_service("asab.TaskService")
 		self.SessionGauge = self.MetricsService.create_gauge(
 			"sessions", tags={"help": "Counts active sessions."}, init_values={"sessions": 0})
+		self.CacheCounter = self.MetricsService.create_counter(
+			"session_cache",
+			tags={"help": "Counts session cache hits and misses."},
+			init_values={"hit": 0, "miss": 0})
+		self.PurgeCounter = self.MetricsService.create_counter(
+			"expired_sessions_purged",
+			tags={"help": "Counts deleted expired sessions and their tokens."},
+			init_values={"sessions": 0, "tokens": 0})
+		self.PurgeDurationGauge = self.MetricsService.create_gauge(
+			"expired_sessions_purge_duration",
+			tags={"help": "Duration of the last expired session purge run.", "unit": "seconds"},
+			init_values={"duration": 0})
+		self.TouchCounter = self.MetricsService.create_counter(
+			"session_touches",
+			tags={"help": "Counts recorded session touches and the database writes they resulted in."},
+			init_values={"recorded": 0, "written": 0})
+		self.BuilderDurationHistogram = self.MetricsService.create_histogram(
+			"session_builder_duration",
+			buckets=[0.001, 0.01, 0.05, 0.1, 0.5, 1, 5, float("inf")],
+			tags={"help": "Time spent in individual session builders.", "unit": "seconds"})
 		app.PubSub.subscribe("Application.tick/10!", self._on_tick_metric)
 
 
@@ -151,6 +213,17 @@ class SessionService(asab.Service):
 		except Exception as e:
 			L.error("Failed to create index (parent session ID): {}".format(e))
 
+		# Revocation job expiration
+		collection = await self.StorageService.collection(self.RevocationJobCollection)
+		try:
+			await collection.create_index([("exp", pymongo.ASCENDING)], expireAfterSeconds=0)
+		except Exception as e:
+			L.error("Failed to create TTL index (revocation job expiration): {}".format(e))
+
+
+	async def finalize(self, app):
+		await self._flush_touches()
+
 
 	async def _on_housekeeping(self, event_name):
 		await self._delete_expired_sessions()
@@ -163,21 +236,145 @@ class SessionService(asab.Service):
 		self.SessionGauge.set("sessions", session_count)
 
 
+	async def _on_totp_change(self, event_name, credentials_id):
+		"""
+		Keep the TOTP flag and available login factors in the credentials' sessions up to date.
+		"""
+		authentication_service = self.App.get_service("seacatauth.AuthenticationService")
+		totp_set = event_name == "TOTP.activated!"
+		available_factors = None
+
+		sessions = []
+		async for session_dict in self._iterate_raw(query_filter={
+			Session.FN.Credentials.Id: credentials_id,
+			Session.FN.Session.Expiration: {"$gt": datetime.datetime.now(datetime.timezone.utc)},
+		}):
+			sessions.append(session_dict)
+
+		for session_dict in sessions:
+			session_builder = [(Session.FN.Authentication.TOTPSet, totp_set)]
+			if Session.FN.Authentication.AvailableFactors in session_dict:
+				if available_factors is None:
+					available_factors = await authentication_service.get_eligible_factors(credentials_id)
+				session_builder.append((Session.FN.Authentication.AvailableFactors, available_factors))
+			try:
+				await self.update_session(session_dict["_id"], [session_builder])
+			except (KeyError, exceptions.SessionNotFoundError):
+				# Session has been deleted or modified concurrently
+				L.info("Cannot update session TOTP status.", struct_data={"sid": session_dict["_id"]})
+
+
+	def _on_tick_purge(self, event_name):
+		# Resume the purge that ran out of its time budget
+		if self.PurgePending and not self.PurgeRunning:
+			self.TaskService.schedule(self._delete_expired_sessions())
+
+
 	async def _delete_expired_sessions(self):
-		# TODO: Improve performance - each self.delete(session_id) call searches for potential subsessions!
-		expired = []
-		async for session in self._iterate_raw(
-			query_filter={
+		"""
+		Delete expired sessions together with their subsessions and tokens in batches.
+		If the purge does not fit into the time budget, it is resumed on the next tick.
+		"""
+		if self.PurgeRunning:
+			return
+		self.PurgeRunning = True
+		try:
+			self.PurgePending = await self._purge_expired_sessions()
+		finally:
+			self.PurgeRunning = False
+
+
+	async def _purge_expired_sessions(self) -> bool:
+		"""
+		Returns:
+			True if there are expired sessions left to purge, otherwise False.
+		"""
+		collection = self.StorageService.Database[self.SessionCollection]
+		start = time.monotonic()
+		deleted_sessions = 0
+		deleted_tokens = 0
+		pending = False
+
+		while True:
+			query_filter = {
 				Session.FN.Session.Expiration: {"$lt": datetime.datetime.now(datetime.timezone.utc)}}
-		):
-			expired.append(session["_id"])
+			cursor = collection.find(query_filter, projection={"_id": 1}).limit(self.PurgeBatchSize)
+			expired = [session_dict["_id"] async for session_dict in cursor]
+			if len(expired) == 0:
+				break
+
+			_, session_count, token_count = await self._delete_session_batch(expired)
+			deleted_sessions += session_count
+			deleted_tokens += token_count
+
+			if len(expired) < self.PurgeBatchSize:
+				break
+
+			if time.monotonic() - start > self.PurgeTimeBudget:
+				pending = True
+				break
+
+		duration = time.monotonic() - start
+		self.PurgeCounter.add("sessions", deleted_sessions)
+		self.PurgeCounter.add("tokens", deleted_tokens)
+		self.PurgeDurationGauge.set("duration", duration)
+
+		if deleted_sessions > 0:
+			L.log(asab.LOG_NOTICE, "Expired sessions deleted.", struct_data={
+				"count": deleted_sessions,
+				"token_count": deleted_tokens,
+				"duration": round(duration, 3),
+				"pending": pending,
+			})
+		return pending
+
+
+	async def _delete_session_batch(self, session_ids: list) -> typing.Tuple[list, int, int]:
+		"""
+		Delete sessions together with all their subsessions and tokens using a constant number of queries.
+
+		Returns:
+			IDs of the sessions and subsessions, number of deleted sessions and number of deleted tokens
+		"""
+		to_delete = await self._collect_subsessions(session_ids)
+		session_count, token_count = await self._delete_sessions_by_ids(to_delete)
+		return to_delete, session_count, token_count
 
-		for sid in expired:
-			# Use the delete method for proper session termination
-			await self.delete(session_id=sid)
 
-		if len(expired) > 0:
-			L.log(asab.LOG_NOTICE, "Expired sessions deleted.", struct_data={"count": len(expired)})
+	async def _collect_subsessions(self, session_ids: list) -> list:
+		"""
+		Get the IDs of the sessions together with the IDs of all their subsessions.
+		"""
+		collection = self.StorageService.Database[self.SessionCollection]
+		to_delete = set(session_ids)
+		async for session_dict in collection.aggregate([
+			{"$match": {"_id": {"$in": session_ids}}},
+			{"$graphLookup": {
+				"from": self.SessionCollection,
+				"startWith": "$_id",
+				"connectFromField": "_id",
+				"connectToField": Session.FN.Session.ParentSessionId,
+				"as": "descendants",
+			}},
+			{"$project": {"descendants._id": 1}},
+		]):
+			to_delete.update(descendant["_id"] for descendant in session_dict["descendants"])
+		return list(to_delete)
+
+
+	async def _delete_sessions_by_ids(self, session_ids: list) -> typing.Tuple[int, int]:
+		"""
+		Delete sessions and their tokens. Subsessions are not looked up.
+
+		Returns:
+			Number of deleted sessions and number of deleted tokens
+		"""
+		collection = self.StorageService.Database[self.SessionCollection]
+		result = await collection.delete_many({"_id": {"$in": session_ids}})
+		token_count = await self.TokenService.delete_tokens_by_session_ids(session_ids)
+		for session_id in session_ids:
+			self._delete_from_cache(session_id)
+		return result.deleted_count, token_count
 
 
 	async def create_session(
@@ -270,6 +467,7 @@ class SessionService(asab.Service):
 					upsertor.set(key, value, encrypt=(key in Session.EncryptedAttributes))
 
 		await upsertor.execute(event_type=EventTypes.SESSION_UPDATED)
+		self._delete_from_cache(session_id)
 		return await self.get(session_id)
 
 
@@ -286,6 +484,7 @@ class SessionService(asab.Service):
 		)
 		upsertor.set(Session.FN.Session.Expiration, expires_at)
 		await upsertor.execute(event_type=EventTypes.SESSION_UPDATED)
+		self._delete_from_cache(session_id)
 
 		L.log(asab.LOG_NOTICE, "Session expiration updated.", struct_data={
 			"sid": session_id,
@@ -295,6 +494,16 @@ class SessionService(asab.Service):
 
 
 	async def get_by(self, key: str, value):
+		cache_key = None
+		if key in Session.EncryptedIdentifierFields and self.CacheIndex is not None:
+			cache_key = (key, hashlib.sha256(value).digest())
+			session_id = self.CacheIndex.get(cache_key)
+			if session_id is not None:
+				session_dict = self._get_from_cache(session_id)
+				if session_dict is not None:
+					return self._build_session(session_dict, query={key: value})
+			self.CacheCounter.add("miss", 1)
+
 		# Encrypt sensitive fields
 		if key in Session.EncryptedIdentifierFields:
 			value = Session.EncryptedPrefix + self.aes_encrypt(value)
@@ -310,22 +519,12 @@ class SessionService(asab.Service):
 		if session_dict is None:
 			raise exceptions.SessionNotFoundError("Session not found.", query={key: value})
 
-		# Do not return expired sessions
-		expires_at = session_dict[Session.FN.Session.Expiration]
-		if expires_at < datetime.datetime.now(datetime.timezone.utc):
-			raise exceptions.SessionNotFoundError("Session expired.", query={key: value})
-
 		session_dict = self._decrypt_encrypted_session_identifiers(session_dict)
+		self._store_in_cache(session_dict)
+		if cache_key is not None:
+			self.CacheIndex.set(cache_key, session_dict[Session.FN.SessionId])
 
-		try:
-			session = Session(session_dict)
-		except Exception as e:
-			L.exception("Failed to create Session from database object.", struct_data={
-				"sid": session_dict.get("_id"),
-			})
-			raise exceptions.SessionNotFoundError("Session deserialization failed.", query={key: value}) from e
-
-		return session
+		return self._build_session(session_dict, query={key: value})
 
 
 	async def get(self, session_id):
@@ -334,6 +533,13 @@ class SessionService(asab.Service):
 				session_id = bson.ObjectId(session_id)
 		except bson.errors.InvalidId as e:
 			raise exceptions.SessionNotFoundError("Invalid session ID format.", session_id=session_id) from e
+
+		session_dict = self._get_from_cache(session_id)
+		if session_dict is not None:
+			return self._build_session(session_dict, session_id=session_id)
+		if self.Cache is not None:
+			self.CacheCounter.add("miss", 1)
+
 		try:
 			session_dict = await self.StorageService.get(
 				self.SessionCollection, session_id, decrypt=Session.EncryptedAttributes)
@@ -344,22 +550,111 @@ class SessionService(asab.Service):
 			L.warning("ValueError when retrieving session: {}".format(e), struct_data={"sid": session_id})
 			raise exceptions.SessionNotFoundError("Session not found.", session_id=session_id)
 
-		# Do not return expired sessions
-		if session_dict[Session.FN.Session.Expiration] < datetime.datetime.now(datetime.timezone.utc):
-			raise exceptions.SessionNotFoundError("Session expired.", session_id=session_id)
+		session_dict = self._decrypt_encrypted_session_identifiers(session_dict)
+		self._store_in_cache(session_dict)
+		return self._build_session(session_dict, session_id=session_id)
+
+
+	async def get_by_auth_token(
+		self,
+		token: bytes,
+		token_type: str,
+	) -> typing.Tuple[dict, typing.Optional[Session]]:
+		"""
+		Get a valid auth token and its session in a single database round trip.
+
+		Args:
+			token: Raw token value
+			token_type: Type of the token
+
+		Returns:
+			Token data and the session. The session is None if the token points to a nonexistent session.
+
+		Raises:
+			KeyError: Token not found or expired.
+			SessionNotFoundError: Session expired or cannot be deserialized.
+		"""
+		token_data, session_dict = await self.TokenService.get_with_session(
+			token, self.SessionCollection, token_type=token_type)
+		if session_dict is None:
+			return token_data, None
+
+		session_id = session_dict[Session.FN.SessionId]
+
+		# Prefer the cached session, it may hold state that is not written to the database yet (deferred touches)
+		cached_session_dict = self._get_from_cache(session_id)
+		if cached_session_dict is not None:
+			return token_data, self._build_session(cached_session_dict, session_id=session_id)
+		if self.Cache is not None:
+			self.CacheCounter.add("miss", 1)
+
+		try:
+			self._decrypt_session_attributes(session_dict)
+		except ValueError as e:
+			# Likely a problem with obsolete decryption
+			L.warning("ValueError when retrieving session: {}".format(e), struct_data={"sid": session_id})
+			raise exceptions.SessionNotFoundError("Session not found.", session_id=session_id)
 
 		session_dict = self._decrypt_encrypted_session_identifiers(session_dict)
+		self._store_in_cache(session_dict)
+		return token_data, self._build_session(session_dict, session_id=session_id)
+
+
+	def _decrypt_session_attributes(self, session_dict: dict):
+		"""
+		Decrypt storage-encrypted session attributes in place.
+		"""
+		for field in Session.EncryptedAttributes:
+			if field in session_dict:
+				try:
+					session_dict[field] = self.StorageService.aes_decrypt(session_dict[field])
+				except ValueError:
+					# BACK COMPAT: Values encrypted with flawed padding in previous versions
+					session_dict[field] = self.StorageService.aes_decrypt(session_dict[field], _obsolete_padding=True)
+
+
+	def _build_session(self, session_dict: dict, **error_details) -> Session:
+		"""
+		Create Session object from a decrypted session dict. Expired sessions are not returned.
+		"""
+		# Do not return expired sessions
+		if session_dict[Session.FN.Session.Expiration] < datetime.datetime.now(datetime.timezone.utc):
+			raise exceptions.SessionNotFoundError("Session expired.", **error_details)
 
 		try:
-			session = Session(session_dict)
+			# Session constructor consumes the dict, make sure the cached one stays intact
+			session = Session(dict(session_dict))
 		except Exception as e:
 			L.exception("Failed to create Session from database object.", struct_data={
 				"sid": session_dict.get("_id"),
 			})
-			raise exceptions.SessionNotFoundError("Session deserialization failed.", session_id=session_id) from e
+			raise exceptions.SessionNotFoundError("Session deserialization failed.", **error_details) from e
 		return session
 
 
+	def _get_from_cache(self, session_id: bson.ObjectId) -> dict | None:
+		if self.Cache is None:
+			return None
+		session_dict = self.Cache.get(session_id)
+		if session_dict is not None:
+			self.CacheCounter.add("hit", 1)
+		return session_dict
+
+
+	def _store_in_cache(self, session_dict: dict):
+		if self.Cache is None:
+			return
+		self.Cache.set(session_dict[Session.FN.SessionId], dict(session_dict))
+
+
+	def _delete_from_cache(self, session_id: str | bson.ObjectId):
+		if self.Cache is None:
+			return
+		if isinstance(session_id, str):
+			session_id = bson.ObjectId(session_id)
+		self.Cache.delete(session_id)
+
+
 	async def _iterate_raw(self, page: int = 0, limit: int = None, query_filter: dict = None):
 		"""
 		Yields raw session dicts including ALL the fields.
@@ -491,6 +786,16 @@ class SessionService(asab.Service):
 					"sid": session.Session.Id, "psid": session.Session.ParentSessionId})
 				expires = None
 
+		if self.TouchFlushInterval > 0:
+			# Defer the database write and return the expected state without re-reading it
+			touched_at = datetime.datetime.now(datetime.timezone.utc)
+			self._record_touch(session.SessionId, expires, touched_at)
+			session.ModifiedAt = touched_at
+			session.Session.ModifiedAt = touched_at
+			if expires is not None:
+				session.Session.Expiration = expires
+			return session
+
 		# Update session
 		version = session.Session.Version
 		upsertor = self.StorageService.upsertor(
@@ -510,9 +815,85 @@ class SessionService(asab.Service):
 			# It can be ignored.
 			L.info("Conflict: Session already touched", struct_data={"sid": session.Session.Id, "v": version})
 
+		self._delete_from_cache(session.SessionId)
 		return await self.get(session.SessionId)
 
 
+	def _record_touch(self, session_id, expires: datetime.datetime | None, touched_at: datetime.datetime):
+		"""
+		Store the touch in memory to be written in the next flush. Only the latest expiration is kept.
+		The cached session is updated right away, so that it respects the touch cooldown and the new expiration.
+		"""
+		self.TouchCounter.add("recorded", 1)
+		expires = self._add_pending_touch(session_id, expires)
+
+		if self.Cache is None:
+			return
+		if isinstance(session_id, str):
+			session_id = bson.ObjectId(session_id)
+		session_dict = self.Cache.get(session_id)
+		if session_dict is None:
+			return
+		session_dict[Session.FN.ModifiedAt] = touched_at
+		if expires is not None and expires > session_dict.get(Session.FN.Session.Expiration, expires):
+			session_dict[Session.FN.Session.Expiration] = expires
+
+
+	def _add_pending_touch(self, session_id, expires: datetime.datetime | None) -> datetime.datetime | None:
+		"""
+		Merge the touch into the pending touches, keeping the later expiration. Return the merged expiration.
+		"""
+		pending_expires = self.PendingTouches.get(session_id)
+		if pending_expires is not None and (expires is None or expires < pending_expires):
+			expires = pending_expires
+		self.PendingTouches[session_id] = expires
+		return expires
+
+
+	async def _on_tick_flush_touches(self, event_name):
+		if time.monotonic() - self.LastTouchFlush < self.TouchFlushInterval:
+			return
+		await self._flush_touches()
+
+
+	async def _flush_touches(self):
+		"""
+		Write all pending session touches in a single bulk operation.
+		"""
+		self.LastTouchFlush = time.monotonic()
+		if len(self.PendingTouches) == 0:
+			return
+		touches, self.PendingTouches = self.PendingTouches, {}
+
+		now = datetime.datetime.now(datetime.timezone.utc)
+		requests = []
+		for session_id, expires in touches.items():
+			update = {
+				"_m": now,
+				"_v": {"$add": ["$_v", 1]},
+			}
+			if expires is not None:
+				# Never shorten the session, it may have been extended by another instance
+				update[Session.FN.Session.Expiration] = {"$max": ["${}".format(Session.FN.Session.Expiration), expires]}
+			requests.append(pymongo.UpdateOne({"_id": session_id}, [{"$set": update}]))
+
+		collection = self.StorageService.Database[self.SessionCollection]
+		try:
+			result = await collection.bulk_write(requests, ordered=False)
+			self.TouchCounter.add("written", result.modified_count)
+		except Exception as e:
+			L.error("Failed to write session touches, retrying in the next flush: {}".format(e), struct_data={
+				"count": len(requests)})
+			# Put the touches back, merging them with those recorded in the meantime.
+			# The cached sessions already reflect the touches, so they are kept.
+			for session_id, expires in touches.items():
+				self._add_pending_touch(session_id, expires)
+			return
+
+		for session_id in touches:
+			self._delete_from_cache(session_id)
+
+
 	def _calculate_extended_expiration(self, session: Session, expires: datetime.datetime = None):
 		if session.Session.Expiration >= session.Session.MaxExpiration:
 			return None
@@ -547,45 +928,123 @@ class SessionService(asab.Service):
 
 		# Delete the session itself
 		await self.StorageService.delete(self.SessionCollection, bson.ObjectId(session_id))
+		self._delete_from_cache(session_id)
 		L.log(asab.LOG_NOTICE, "Session deleted", struct_data={"sid": session_id})
 
 		# Delete all the session's tokens
 		await self.TokenService.delete_tokens_by_session_id(session_id)
 
-		# TODO: Publish pubsub message for session deletion
+		self.App.PubSub.publish("Session.deleted!", session_ids=[session_id])
 
 
 	async def delete_all_sessions(self):
 		await self._delete_sessions_by_filter()
 
-	async def _delete_sessions_by_filter(self, query_filter=None):
-		query_filter = query_filter or {}
-		to_delete = []
-		async for session_dict in self._iterate_raw(query_filter=query_filter):
-			to_delete.append(session_dict)
-
-		deleted = 0
-		failed = 0
-		# Delete iteratively so that every session is terminated properly
-		for session_dict in to_delete:
-			try:
-				# TODO: Publish pubsub message for session deletion
-				await self.StorageService.delete(self.SessionCollection, session_dict["_id"])
-				deleted += 1
-			except Exception as e:
-				L.error("Cannot delete session", struct_data={
-					"sid": session_dict["_id"],
-					"error": type(e).__name__
-				})
-				failed += 1
+	async def _delete_sessions_by_filter(self, query_filter=None, job: dict = None):
+		"""
+		Delete matching sessions together with their subsessions and tokens in batches.
+		Every batch is announced with a single "Session.deleted!" message.
 
-			# Delete all the session's tokens
-			await self.TokenService.delete_tokens_by_session_id(session_dict["_id"])
+		Args:
+			query_filter: Sessions to delete
+			job: Revocation job to report the progress to. Its "deleted_count" counts only the sessions
+				matching the filter, the same as its "total_count", while "session_count" includes subsessions.
+		"""
+		query_filter = query_filter or {}
+		collection = self.StorageService.Database[self.SessionCollection]
+		start = time.monotonic()
+		deleted_sessions = 0
+		deleted_tokens = 0
+
+		while True:
+			cursor = collection.find(query_filter, projection={"_id": 1}).limit(self.RevocationBatchSize)
+			batch = [session_dict["_id"] async for session_dict in cursor]
+			if len(batch) == 0:
+				break
+
+			to_delete = await self._collect_subsessions(batch)
+			if job is not None:
+				# Subsessions may match the filter too
+				matched_count = await collection.count_documents(
+					{"$and": [query_filter, {"_id": {"$in": to_delete}}]})
+			session_count, token_count = await self._delete_sessions_by_ids(to_delete)
+			deleted_sessions += session_count
+			deleted_tokens += token_count
+			self.App.PubSub.publish("Session.deleted!", session_ids=to_delete)
+			if job is not None:
+				job["deleted_count"] += matched_count
+				job["session_count"] = deleted_sessions
+				job["token_count"] = deleted_tokens
+				await self._save_revocation_job(job)
+
+			if session_count == 0 or len(batch) < self.RevocationBatchSize:
+				break
 
 		L.log(asab.LOG_NOTICE, "Sessions deleted", struct_data={
-			"deleted_count": deleted,
-			"failed_count": failed
+			"deleted_count": deleted_sessions,
+			"token_count": deleted_tokens,
+			"duration": round(time.monotonic() - start, 3),
 		})
+		return deleted_sessions
+
+
+	async def revoke_sessions(self, query_filter: dict = None) -> dict:
+		"""
+		Delete matching sessions together with their subsessions and tokens.
+		If there are more matching sessions than the configured threshold, they are deleted in the background.
+
+		Returns:
+			Revocation job, which is "running" if the revocation continues in the background
+		"""
+		job = {
+			"job_id": uuid.uuid4().hex,
+			"state": "running",
+			"total_count": await self.count_sessions(query_filter),
+			"deleted_count": 0,
+			"session_count": 0,
+			"token_count": 0,
+			"created_at": datetime.datetime.now(datetime.timezone.utc),
+		}
+		await self._save_revocation_job(job)
+		if job["total_count"] > self.RevocationBackgroundThreshold:
+			L.log(asab.LOG_NOTICE, "Session revocation continues in the background.", struct_data={
+				"job_id": job["job_id"], "count": job["total_count"]})
+			self.TaskService.schedule(self._run_revocation_job(job, query_filter))
+		else:
+			await self._run_revocation_job(job, query_filter)
+		return job
+
+
+	async def get_revocation_job(self, job_id: str) -> dict:
+		"""
+		Get the progress of a session revocation job started by any instance.
+		"""
+		collection = self.StorageService.Database[self.RevocationJobCollection]
+		job = await collection.find_one({"_id": job_id}, projection={"exp": 0})
+		if job is None:
+			raise KeyError(job_id)
+		job["job_id"] = job.pop("_id")
+		return job
+
+
+	async def _save_revocation_job(self, job: dict):
+		collection = self.StorageService.Database[self.RevocationJobCollection]
+		job_dict = {k: v for k, v in job.items() if k != "job_id"}
+		job_dict["exp"] = datetime.datetime.now(datetime.timezone.utc) + self.RevocationJobExpiration
+		await collection.replace_one({"_id": job["job_id"]}, job_dict, upsert=True)
+
+
+	async def _run_revocation_job(self, job: dict, query_filter: dict = None):
+		try:
+			await self._delete_sessions_by_filter(query_filter, job=job)
+			job["state"] = "finished"
+		except Exception:
+			job["state"] = "failed"
+			raise
+		finally:
+			job["finished_at"] = datetime.datetime.now(datetime.timezone.utc)
+			await self._save_revocation_job(job)
+
 
 	async def delete_sessions_by_credentials_id(self, credentials_id):
 		await self._delete_sessions_by_filter(
@@ -726,24 +1185,30 @@ class SessionService(asab.Service):
 
 		scope = frozenset(["profile", "email", "phone"])
 		ext_login_svc = self.App.get_service("seacatauth.ExternalCredentialsService")
-		session_builders = [
-			await credentials_session_builder(credentials_service, credentials_id, scope),
-			authentication_session_builder(login_descriptor),
-			await available_factors_session_builder(authentication_service, credentials_id),
+		otp_service = self.App.get_service("seacatauth.OTPService")
+		built = await self._run_session_builders({
+			"credentials": credentials_session_builder(credentials_service, credentials_id, scope),
+			"totp": totp_session_builder(otp_service, credentials_id),
+			"available_factors": available_factors_session_builder(authentication_service, credentials_id),
 			# TODO: SSO session should not need to have Authz data
-			await authz_session_builder(
+			"authz": authz_session_builder(
 				tenant_service=tenant_service,
 				role_service=role_service,
 				credentials_id=credentials_id,
 				tenants=None,  # Root session is tenant-agnostic
 			),
+			"external_login": self._external_login_session_builder(ext_login_svc, credentials_id),
+		})
+
+		session_builders = [
+			built["credentials"],
+			built["totp"],
+			authentication_session_builder(login_descriptor),
+			built["available_factors"],
+			built["authz"],
 			cookie_session_builder(),
+			built["external_login"],
 		]
-
-		with local_authz(self.Name, resources={ResourceId.CREDENTIALS_ACCESS}):
-			session_builders.append(await external_login_session_builder(
-				ext_login_svc, credentials_id))
-
 		return session_builders
 
 
@@ -755,6 +1220,7 @@ class SessionService(asab.Service):
 		tenants: typing.Iterable[str] = None,
 		nonce: typing.Optional[str] = None,
 		redirect_uri: typing.Optional[str] = None,
+		authz_context=None,
 	):
 		authentication_service = self.App.get_service("seacatauth.AuthenticationService")
 		external_login_service = self.App.get_service("seacatauth.ExternalCredentialsService")
@@ -762,6 +1228,7 @@ class SessionService(asab.Service):
 		tenant_service = self.App.get_service("seacatauth.TenantService")
 		role_service = self.App.get_service("seacatauth.RoleService")
 		batman_service = self.App.get_service("seacatauth.BatmanService")
+		otp_service = self.App.get_service("seacatauth.OTPService")
 
 		# TODO: Choose builders based on scope
 		# Make sure dangerous resources are removed from impersonated sessions
@@ -770,24 +1237,37 @@ class SessionService(asab.Service):
 		else:
 			exclude_resources = set()
 
-		session_builders = [
-			await credentials_session_builder(credentials_service, root_session.Credentials.Id, scope),
-			await authz_session_builder(
+		include_authn_info = "profile" in scope or "userinfo:authn" in scope or "userinfo:*" in scope
+		builders = {
+			"credentials": credentials_session_builder(
+				credentials_service, root_session.Credentials.Id, scope, authz_context=authz_context),
+			"totp": totp_session_builder(otp_service, root_session.Credentials.Id),
+			"authz": authz_session_builder(
 				tenant_service=tenant_service,
 				role_service=role_service,
 				credentials_id=root_session.Credentials.Id,
 				tenants=tenants,
 				exclude_resources=exclude_resources,
+				authz_context=authz_context,
 			),
+		}
+		if include_authn_info:
+			builders["external_login"] = self._external_login_session_builder(
+				external_login_service, root_session.Credentials.Id)
+			builders["available_factors"] = available_factors_session_builder(
+				authentication_service, root_session.Credentials.Id)
+		built = await self._run_session_builders(builders)
+
+		session_builders = [
+			built["credentials"],
+			built["totp"],
+			built["authz"],
 			[(Session.FN.Authentication.AuthnTime, root_session.Authentication.AuthnTime)]
 		]
 
-		if "profile" in scope or "userinfo:authn" in scope or "userinfo:*" in scope:
-			with local_authz(self.Name, resources={ResourceId.CREDENTIALS_ACCESS}):
-				session_builders.append(await external_login_session_builder(
-					external_login_service, root_session.Credentials.Id))
-			session_builders.append(
-				await available_factors_session_builder(authentication_service, root_session.Credentials.Id))
+		if include_authn_info:
+			session_builders.append(built["external_login"])
+			session_builders.append(built["available_factors"])
 			session_builders.append([
 				(Session.FN.Authentication.LoginDescriptor, root_session.Authentication.LoginDescriptor),
 				(Session.FN.Authentication.LoginFactors, root_session.Authentication.LoginFactors),
@@ -823,6 +1303,39 @@ class SessionService(asab.Service):
 		return session_builders
 
 
+	async def _run_session_builders(self, builders: typing.Dict[str, typing.Awaitable]) -> dict:
+		"""
+		Run independent session builders concurrently and record their durations.
+
+		Every builder runs in its own task with a copy of the current context,
+		so context variables set inside one builder do not affect the others.
+
+		Args:
+			builders: Maps builder names to builder coroutines
+
+		Returns:
+			dict: Maps builder names to their results, in the order of the input
+		"""
+		async def run_timed(name, builder):
+			start = time.perf_counter()
+			try:
+				return await builder
+			finally:
+				self.BuilderDurationHistogram.set(name, time.perf_counter() - start)
+
+		results = await asyncio.gather(*(
+			run_timed(name, builder)
+			for name, builder in builders.items()
+		))
+		return dict(zip(builders.keys(), results))
+
+
+	async def _external_login_session_builder(self, external_login_service, credentials_id: str):
+		# Local authorization is entered inside the builder task to keep it from leaking into other builders
+		with local_authz(self.Name, resources={ResourceId.CREDENTIALS_ACCESS}):
+			return await external_login_session_builder(external_login_service, credentials_id)
+
+
 	def aes_encrypt(self, raw_bytes: bytes):
 		algorithm = cryptography.hazmat.primitives.ciphers.algorithms.AES(self.AESKey)
 		iv, token = raw_bytes[:self.AESBlockSize], raw_bytes[self.AESBlockSize:]
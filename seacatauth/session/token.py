@@ -23,6 +23,17 @@ class SessionTokenField:
 	Version = "_v"
 
 
+# Fields needed for token validation and session lookup
+_TOKEN_PROJECTION = {
+	SessionTokenField.TokenType: 1,
+	SessionTokenField.SessionId: 1,
+	SessionTokenField.IsSessionAlgorithmic: 1,
+	SessionTokenField.ExpiresAt: 1,
+	SessionTokenField.CodeChallenge: 1,
+	SessionTokenField.CodeChallengeMethod: 1,
+}
+
+
 class SessionTokenService(asab.Service):
 	"""
 	Create and manage securely hashed session identifiers (tokens)
@@ -37,7 +48,6 @@ class SessionTokenService(asab.Service):
 	def __init__(self, app, service_name="seacatauth.SessionTokenService"):
 		super().__init__(app, service_name)
 		self.StorageService = app.get_service("asab.StorageService")
-		app.PubSub.subscribe("Application.housekeeping!", self._on_housekeeping)
 
 
 	async def initialize(self, app):
@@ -48,9 +58,15 @@ class SessionTokenService(asab.Service):
 			L.error("Failed to create secondary index (session ID): {}".format(e), struct_data={
 				"collection": self.SessionTokenCollection})
 
-
-	async def _on_housekeeping(self, event_name):
-		await self._delete_expired_tokens()
+		# Expired tokens are deleted by the database
+		try:
+			await collection.create_index(
+				[(SessionTokenField.ExpiresAt, pymongo.ASCENDING)],
+				expireAfterSeconds=0,
+			)
+		except Exception as e:
+			L.error("Failed to create TTL index (expiration): {}".format(e), struct_data={
+				"collection": self.SessionTokenCollection})
 
 
 	async def create(
@@ -106,15 +122,80 @@ class SessionTokenService(asab.Service):
 		@param token_type: Type of the token
 		@return:
 		"""
-		token_hash = _hash_token(token)
-		data = await self.StorageService.get(self.SessionTokenCollection, token_hash)
-		if not _is_token_valid(data):
-			raise KeyError("Auth token expired.")
-		if token_type is not None and data["t"] != token_type:
-			raise KeyError("Auth token type does not match.")
+		collection = self.StorageService.Database[self.SessionTokenCollection]
+		query_filter = _valid_token_filter(token_type)
+		query_filter["_id"] = _hash_token(token)
+		data = await collection.find_one(query_filter, projection=_TOKEN_PROJECTION)
+		if data is None:
+			raise KeyError("Auth token not found or expired.")
 		return data
 
 
+	async def get_many(
+		self,
+		tokens: typing.Iterable[bytes],
+		token_type: typing.Optional[str] = None,
+	) -> typing.Dict[bytes, dict]:
+		"""
+		Get multiple auth tokens in a single query
+
+		Args:
+			tokens: Raw token values
+			token_type: Type of the tokens
+
+		Returns:
+			Dictionary of valid tokens and their data. Tokens that are not found or expired are omitted.
+		"""
+		tokens_by_hash = {_hash_token(token): token for token in tokens}
+		if len(tokens_by_hash) == 0:
+			return {}
+
+		collection = self.StorageService.Database[self.SessionTokenCollection]
+		query_filter = _valid_token_filter(token_type)
+		query_filter["_id"] = {"$in": list(tokens_by_hash)}
+		result = {}
+		async for data in collection.find(query_filter, projection=_TOKEN_PROJECTION):
+			result[tokens_by_hash[data["_id"]]] = data
+		return result
+
+
+	async def get_with_session(
+		self,
+		token: bytes,
+		session_collection: str,
+		token_type: typing.Optional[str] = None,
+	) -> typing.Tuple[dict, typing.Optional[dict]]:
+		"""
+		Get auth token together with its raw session object in a single query
+
+		Args:
+			token: Raw token value
+			session_collection: Name of the session collection
+			token_type: Type of the token
+
+		Returns:
+			Token data and the raw session object, or None if the session does not exist
+		"""
+		collection = self.StorageService.Database[self.SessionTokenCollection]
+		query_filter = _valid_token_filter(token_type)
+		query_filter["_id"] = _hash_token(token)
+		pipeline = [
+			{"$match": query_filter},
+			{"$limit": 1},
+			{"$project": _TOKEN_PROJECTION},
+			{"$lookup": {
+				"from": session_collection,
+				"localField": SessionTokenField.SessionId,
+				"foreignField": "_id",
+				"as": "_session",
+			}},
+		]
+		async for data in collection.aggregate(pipeline):
+			sessions = data.pop("_session")
+			return data, (sessions[0] if sessions else None)
+		raise KeyError("Auth token not found or expired.")
+
+
 	async def extend(self, token: bytes, expiration: float):
 		"""
 		Extend auth token validity
@@ -150,19 +231,6 @@ class SessionTokenService(asab.Service):
 			"sid": token_data[SessionTokenField.SessionId], "type": token_data[SessionTokenField.TokenType]})
 
 
-	async def _delete_expired_tokens(self):
-		"""
-		Delete expired auth tokens
-		"""
-		collection = self.StorageService.Database[self.SessionTokenCollection]
-		query_filter = {SessionTokenField.ExpiresAt: {"$lt": datetime.datetime.now(datetime.timezone.utc)}}
-		result = await collection.delete_many(query_filter)
-		if result.deleted_count > 0:
-			L.log(asab.LOG_NOTICE, "Expired session tokens deleted.", struct_data={
-				"count": result.deleted_count
-			})
-
-
 	async def delete_tokens_by_session_id(self, session_id: str):
 		"""
 		Delete all of session's auth tokens
@@ -177,11 +245,28 @@ class SessionTokenService(asab.Service):
 			})
 
 
-def _is_token_valid(token_data: dict):
-	return (
-		SessionTokenField.ExpiresAt in token_data
-		and token_data[SessionTokenField.ExpiresAt] > datetime.datetime.now(datetime.UTC)
-	)
+	async def delete_tokens_by_session_ids(self, session_ids: typing.Iterable) -> int:
+		"""
+		Delete all auth tokens of multiple sessions at once
+
+		Returns:
+			Number of deleted tokens
+		"""
+		collection = self.StorageService.Database[self.SessionTokenCollection]
+		query_filter = {SessionTokenField.SessionId: {"$in": [bson.ObjectId(sid) for sid in session_ids]}}
+		result = await collection.delete_many(query_filter)
+		return result.deleted_count
+
+
+def _valid_token_filter(token_type: typing.Optional[str] = None) -> dict:
+	"""
+	Match tokens that have not expired yet.
+	The TTL index removes expired tokens only periodically, so the expiration must still be checked in the query.
+	"""
+	query_filter = {SessionTokenField.ExpiresAt: {"$gt": datetime.datetime.now(datetime.UTC)}}
+	if token_type is not None:
+		query_filter[SessionTokenField.TokenType] = token_type
+	return query_filter
 
 
 def _hash_token(token: bytes):
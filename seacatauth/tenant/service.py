@@ -316,9 +316,14 @@ class TenantService(asab.Service):
 		self.App.PubSub.publish("Tenant.unassigned!", credentials_id=credentials_id, tenant_id=tenant)
 
 
-	async def get_tenants_by_scope(self, scope: list, credential_id: str, has_access_to_all_tenants: bool = False):
+	async def get_tenants_by_scope(
+		self, scope: list, credential_id: str,
+		has_access_to_all_tenants: bool = False,
+		user_tenants: list = None,
+	):
 		"""
 		Returns a set of tenants for given credentials and scope and validates tenant access.
+		Tenants assigned to the credentials are fetched unless they are supplied in `user_tenants`.
 
 		"tenant:<tenant_name>" in scope requests access to a specific tenant
 		"tenant:*" in scope requests access to all the credentials' tenants
@@ -326,7 +331,8 @@ class TenantService(asab.Service):
 			user's last authorized tenant is requested.
 		"""
 		tenants = set()
-		user_tenants = await self.get_tenants(credential_id)
+		if user_tenants is None:
+			user_tenants = await self.get_tenants(credential_id)
 		for resource in scope:
 			if not resource.startswith("tenant:"):
 				continue
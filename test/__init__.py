@@ -1,2 +1,7 @@
 from .test_rbac import *
 from .test_oauth_url import *
+from .test_cache import *
+from .test_session_revocation import *
+from .test_authz_context import *
+from .test_session_token import *
+from .test_session_touch import *
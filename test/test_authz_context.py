@@ -0,0 +1,100 @@
+import unittest
+
+from seacatauth.authz.context import CredentialsAuthzContext
+from seacatauth.authz.utils import build_credentials_authz_bulk
+
+
+class _RoleService:
+	"""
+	Stand-in for the role service that counts the role assignment queries.
+	"""
+
+	TenantBaseRole = None
+
+	RoleAssignments = {
+		"alice": ["*/reader", "acme/editor", "acme/~viewer", "globex/admin", "initech/editor"],
+	}
+
+	RoleResources = {
+		"*/reader": ["post:read"],
+		"acme/editor": ["post:write", "post:edit"],
+		"acme/~viewer": ["dashboard:read"],
+		"globex/admin": ["post:write", "post:delete", "seacat:tenant:access"],
+		"initech/editor": ["post:write"],
+	}
+
+	def __init__(self):
+		self.QueryCount = 0
+
+	async def get_roles_by_credentials(self, credentials_id, tenants):
+		self.QueryCount += 1
+		tenants = set(tenants)
+		return [
+			role for role in self.RoleAssignments.get(credentials_id, [])
+			if role.startswith("*/") or role.split("/", 1)[0] in tenants
+		]
+
+	async def get_resources_by_roles(self, roles):
+		return {role: self.RoleResources[role] for role in roles if role in self.RoleResources}
+
+	def parse_role_id(self, role_id):
+		tenant_id, role_name = role_id.split("/", 1)
+		if tenant_id == "*":
+			tenant_id = None
+		return tenant_id, role_name
+
+
+class CredentialsAuthzContextTestCase(unittest.IsolatedAsyncioTestCase):
+
+	def setUp(self):
+		self.RoleService = _RoleService()
+		self.Context = CredentialsAuthzContext(
+			credentials_service=None, tenant_service=None, role_service=self.RoleService, credentials_id="alice")
+
+	async def assertAuthzEqualsFresh(self, tenants=None, exclude_resources=None):
+		# The memoized result must not differ from an authz built from scratch
+		authz = await self.Context.get_authz(tenants, exclude_resources)
+		expected = await build_credentials_authz_bulk(
+			None, _RoleService(), "alice", tenants, exclude_resources)
+		self.assertEqual(
+			{tenant: sorted(resources) for tenant, resources in authz.items()},
+			{tenant: sorted(resources) for tenant, resources in expected.items()},
+		)
+
+	async def test_subset(self):
+		await self.assertAuthzEqualsFresh(["acme", "globex", "initech"])
+		self.assertEqual(self.RoleService.QueryCount, 1)
+
+		# Subsets are answered from the earlier build
+		await self.assertAuthzEqualsFresh(["globex"])
+		await self.assertAuthzEqualsFresh(["acme", "initech"])
+		self.assertEqual(self.RoleService.QueryCount, 1)
+
+	async def test_global_authz(self):
+		await self.assertAuthzEqualsFresh(["acme"])
+		# Global authz is contained in any earlier build
+		await self.assertAuthzEqualsFresh()
+		await self.assertAuthzEqualsFresh([])
+		self.assertEqual(self.RoleService.QueryCount, 1)
+
+	async def test_superset(self):
+		await self.assertAuthzEqualsFresh(["acme"])
+		await self.assertAuthzEqualsFresh(["acme", "globex"])
+		self.assertEqual(self.RoleService.QueryCount, 2)
+
+		# Both builds are remembered
+		await self.assertAuthzEqualsFresh(["globex"])
+		await self.assertAuthzEqualsFresh(["acme"])
+		self.assertEqual(self.RoleService.QueryCount, 2)
+
+	async def test_exclude_resources(self):
+		await self.assertAuthzEqualsFresh(["acme", "globex"])
+		# A build with different excluded resources cannot be reused
+		await self.assertAuthzEqualsFresh(["acme"], exclude_resources=["post:write"])
+		await self.assertAuthzEqualsFresh(["globex"], exclude_resources=["seacat:tenant:access"])
+		self.assertEqual(self.RoleService.QueryCount, 3)
+
+		# Subsets with the same excluded resources can
+		await self.assertAuthzEqualsFresh([], exclude_resources=["post:write"])
+		await self.assertAuthzEqualsFresh(None, exclude_resources={"post:write"})
+		self.assertEqual(self.RoleService.QueryCount, 3)
@@ -0,0 +1,72 @@
+import time
+import unittest
+
+from seacatauth.generic import TTLCache
+
+
+class TTLCacheTestCase(unittest.TestCase):
+
+	def test_get_and_set(self):
+		cache = TTLCache(max_size=10, expiration=60)
+		self.assertIsNone(cache.get("a"))
+		self.assertEqual(cache.get("a", "default"), "default")
+		cache.set("a", 1)
+		self.assertEqual(cache.get("a"), 1)
+		cache.set("a", 2)
+		self.assertEqual(cache.get("a"), 2)
+		self.assertEqual(len(cache), 1)
+
+	def test_delete(self):
+		cache = TTLCache(max_size=10, expiration=60)
+		cache.set("a", 1)
+		cache.delete("a")
+		self.assertIsNone(cache.get("a"))
+		# Deleting a missing key is a no-op
+		cache.delete("b")
+
+	def test_expiration(self):
+		cache = TTLCache(max_size=10, expiration=60)
+		cache.set("a", 1, expiration=-1)
+		self.assertIsNone(cache.get("a"))
+		self.assertEqual(len(cache), 0)
+
+		cache.set("b", 2, expiration=0.01)
+		time.sleep(0.02)
+		self.assertIsNone(cache.get("b"))
+
+	def test_lru_eviction(self):
+		cache = TTLCache(max_size=2, expiration=60)
+		cache.set("a", 1)
+		cache.set("b", 2)
+		# Access "a" so that "b" becomes the least recently used entry
+		cache.get("a")
+		cache.set("c", 3)
+		self.assertEqual(len(cache), 2)
+		self.assertEqual(cache.get("a"), 1)
+		self.assertIsNone(cache.get("b"))
+		self.assertEqual(cache.get("c"), 3)
+
+	def test_delete_matching(self):
+		cache = TTLCache(max_size=10, expiration=60)
+		cache.set("a", 1)
+		cache.set("b", 2)
+		cache.set("c", 3)
+		# The predicate receives both the key and the value
+		self.assertEqual(cache.delete_matching(lambda key, value: key == "a" or value == 3), 2)
+		self.assertIsNone(cache.get("a"))
+		self.assertEqual(cache.get("b"), 2)
+		self.assertIsNone(cache.get("c"))
+		self.assertEqual(cache.delete_matching(lambda key, value: False), 0)
+		self.assertEqual(len(cache), 1)
+
+	def test_delete_expired(self):
+		cache = TTLCache(max_size=10, expiration=60)
+		cache.set("a", 1, expiration=-1)
+		cache.set("b", 2, expiration=-1)
+		cache.set("c", 3)
+		# Expired entries stay in the cache until they are read or purged
+		self.assertEqual(len(cache), 3)
+		self.assertEqual(cache.delete_expired(), 2)
+		self.assertEqual(len(cache), 1)
+		self.assertEqual(cache.get("c"), 3)
+		self.assertEqual(cache.delete_expired(), 0)
@@ -0,0 +1,181 @@
+import asyncio
+import datetime
+import types
+import unittest
+
+import seacatauth.authz  # noqa: F401 (the session module cannot be imported first)
+from seacatauth.session.service import SessionService
+from seacatauth.models import Session
+
+
+PARENT = Session.FN.Session.ParentSessionId
+CREDENTIALS = Session.FN.Credentials.Id
+
+
+def _matches(document, query_filter):
+	for key, value in query_filter.items():
+		if key == "$and":
+			if not all(_matches(document, f) for f in value):
+				return False
+		elif isinstance(value, dict):
+			if document.get(key) not in value["$in"]:
+				return False
+		elif document.get(key) != value:
+			return False
+	return True
+
+
+class _Cursor:
+
+	def __init__(self, items):
+		self.Items = items
+
+	def limit(self, limit):
+		self.Items = self.Items[:limit]
+		return self
+
+	async def __aiter__(self):
+		for item in self.Items:
+			yield item
+
+
+class _Collection:
+	"""
+	Minimal in-memory stand-in for the few Motor collection methods used by the session revocation.
+	"""
+
+	def __init__(self):
+		self.Documents = {}
+
+	def find(self, query_filter, projection=None):
+		return _Cursor([d for d in self.Documents.values() if _matches(d, query_filter)])
+
+	def aggregate(self, pipeline):
+		# Only the $graphLookup of subsessions is supported
+		result = []
+		for session_id in pipeline[0]["$match"]["_id"]["$in"]:
+			descendants = []
+			parents = [session_id]
+			while len(parents) > 0:
+				parent_id = parents.pop()
+				children = [d for d in self.Documents.values() if d.get(PARENT) == parent_id]
+				descendants.extend(children)
+				parents.extend(child["_id"] for child in children)
+			result.append({"_id": session_id, "descendants": descendants})
+		return _Cursor(result)
+
+	async def find_one(self, query_filter, projection=None):
+		document = self.Documents.get(query_filter["_id"])
+		if document is None:
+			return None
+		return {k: v for k, v in document.items() if k not in (projection or {})}
+
+	async def count_documents(self, query_filter):
+		return len([d for d in self.Documents.values() if _matches(d, query_filter)])
+
+	async def delete_many(self, query_filter):
+		deleted = [self.Documents.pop(i) for i in query_filter["_id"]["$in"] if i in self.Documents]
+		return types.SimpleNamespace(deleted_count=len(deleted))
+
+	async def replace_one(self, query_filter, document, upsert=False):
+		self.Documents[query_filter["_id"]] = dict(document, _id=query_filter["_id"])
+
+
+class SessionRevocationTestCase(unittest.IsolatedAsyncioTestCase):
+
+	def setUp(self):
+		self.Sessions = _Collection()
+		self.Jobs = _Collection()
+		self.Published = []
+		self.Tasks = []
+		self.FailTokenDeletion = False
+
+		async def delete_tokens_by_session_ids(session_ids):
+			if self.FailTokenDeletion:
+				raise RuntimeError("Token deletion failed")
+			return len(session_ids)
+
+		def publish(message_type, session_ids):
+			self.Published.append(session_ids)
+
+		service = SessionService.__new__(SessionService)
+		service.StorageService = types.SimpleNamespace(Database={
+			service.SessionCollection: self.Sessions,
+			service.RevocationJobCollection: self.Jobs,
+		})
+		service.TokenService = types.SimpleNamespace(delete_tokens_by_session_ids=delete_tokens_by_session_ids)
+		service.TaskService = types.SimpleNamespace(schedule=lambda coro: self.Tasks.append(asyncio.ensure_future(coro)))
+		service.App = types.SimpleNamespace(PubSub=types.SimpleNamespace(publish=publish))
+		service.Cache = None
+		service.CacheIndex = None
+		service.RevocationBatchSize = 10
+		service.RevocationBackgroundThreshold = 100
+		service.RevocationJobExpiration = datetime.timedelta(hours=1)
+		self.SessionService = service
+
+	def add_sessions(self, count, credentials_id, subsession_credentials_id=None):
+		# Every root session gets one subsession
+		for i in range(count):
+			root_id = "{}-root-{}".format(credentials_id, i)
+			self.Sessions.Documents[root_id] = {"_id": root_id, CREDENTIALS: credentials_id}
+			sub_id = "{}-sub-{}".format(credentials_id, i)
+			self.Sessions.Documents[sub_id] = {
+				"_id": sub_id, PARENT: root_id, CREDENTIALS: subsession_credentials_id or credentials_id}
+
+	async def test_revocation_in_batches(self):
+		self.add_sessions(25, "alice", subsession_credentials_id="client")
+		self.add_sessions(1, "bob")
+
+		job = await self.SessionService.revoke_sessions({CREDENTIALS: "alice"})
+		self.assertEqual(job["state"], "finished")
+		self.assertEqual(job["total_count"], 25)
+		self.assertEqual(job["deleted_count"], 25)
+		self.assertEqual(job["session_count"], 50)
+		self.assertEqual(job["token_count"], 50)
+		# One "Session.deleted!" message per batch, including the subsessions
+		self.assertEqual([len(ids) for ids in self.Published], [20, 20, 10])
+		self.assertEqual(sorted(self.Sessions.Documents), ["bob-root-0", "bob-sub-0"])
+
+	async def test_progress_with_matching_subsessions(self):
+		# Subsessions match the filter as well, but are deleted together with their parent
+		self.add_sessions(25, "alice")
+
+		job = await self.SessionService.revoke_sessions({CREDENTIALS: "alice"})
+		self.assertEqual(job["state"], "finished")
+		self.assertEqual(job["total_count"], 50)
+		self.assertEqual(job["deleted_count"], 50)
+		self.assertEqual(job["session_count"], 50)
+		self.assertEqual(len(self.Sessions.Documents), 0)
+
+	async def test_background_job(self):
+		self.add_sessions(25, "alice")
+		self.SessionService.RevocationBackgroundThreshold = 10
+
+		job = await self.SessionService.revoke_sessions({CREDENTIALS: "alice"})
+		self.assertEqual(job["state"], "running")
+		self.assertEqual(len(self.Tasks), 1)
+
+		# Progress is readable from the database, i.e. from any instance
+		stored_job = await self.SessionService.get_revocation_job(job["job_id"])
+		self.assertEqual(stored_job["state"], "running")
+		self.assertNotIn("exp", stored_job)
+
+		await asyncio.gather(*self.Tasks)
+		stored_job = await self.SessionService.get_revocation_job(job["job_id"])
+		self.assertEqual(stored_job["state"], "finished")
+		self.assertEqual(stored_job["deleted_count"], stored_job["total_count"])
+		self.assertIn("finished_at", stored_job)
+
+	async def test_failed_job(self):
+		self.add_sessions(5, "alice")
+		self.FailTokenDeletion = True
+
+		with self.assertRaises(RuntimeError):
+			await self.SessionService.revoke_sessions({CREDENTIALS: "alice"})
+		job_id, = self.Jobs.Documents
+		stored_job = await self.SessionService.get_revocation_job(job_id)
+		self.assertEqual(stored_job["state"], "failed")
+
+	async def test_unknown_job(self):
+		with self.assertRaises(KeyError):
+			await self.SessionService.get_revocation_job("nonexistent")
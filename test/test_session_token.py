@@ -0,0 +1,88 @@
+import datetime
+import hashlib
+import types
+import unittest
+
+import seacatauth.authz  # noqa: F401 (the session module cannot be imported first)
+from seacatauth.session.token import SessionTokenService, SessionTokenField
+
+
+class _Cursor:
+
+	def __init__(self, items):
+		self.Items = items
+
+	async def __aiter__(self):
+		for item in self.Items:
+			yield item
+
+
+class _TokenCollection:
+	"""
+	Minimal in-memory stand-in for the session token collection that records the queries.
+	"""
+
+	def __init__(self):
+		self.Documents = {}
+		self.Queries = []
+
+	def find(self, query_filter, projection=None):
+		self.Queries.append((query_filter, projection))
+		result = []
+		for token_id in query_filter["_id"]["$in"]:
+			document = self.Documents.get(token_id)
+			if document is None:
+				continue
+			if document[SessionTokenField.ExpiresAt] <= query_filter[SessionTokenField.ExpiresAt]["$gt"]:
+				continue
+			if SessionTokenField.TokenType in query_filter \
+				and document[SessionTokenField.TokenType] != query_filter[SessionTokenField.TokenType]:
+				continue
+			result.append({k: v for k, v in document.items() if k == "_id" or k in projection})
+		return _Cursor(result)
+
+
+class SessionTokenGetManyTestCase(unittest.IsolatedAsyncioTestCase):
+
+	def setUp(self):
+		self.Collection = _TokenCollection()
+		self.TokenService = SessionTokenService.__new__(SessionTokenService)
+		self.TokenService.StorageService = types.SimpleNamespace(Database={
+			self.TokenService.SessionTokenCollection: self.Collection})
+
+		now = datetime.datetime.now(datetime.timezone.utc)
+		self.add_token(b"access-1", "oat", now + datetime.timedelta(hours=1))
+		self.add_token(b"access-2", "oat", now + datetime.timedelta(hours=1))
+		self.add_token(b"expired", "oat", now - datetime.timedelta(seconds=1))
+		self.add_token(b"cookie", "cookie", now + datetime.timedelta(hours=1))
+
+	def add_token(self, token, token_type, expires_at):
+		token_id = hashlib.sha256(token).digest()
+		self.Collection.Documents[token_id] = {
+			"_id": token_id,
+			SessionTokenField.TokenType: token_type,
+			SessionTokenField.SessionId: token.decode(),
+			SessionTokenField.ExpiresAt: expires_at,
+			# Not needed for validation, must not be fetched
+			"_c": expires_at,
+		}
+
+	async def test_get_many(self):
+		result = await self.TokenService.get_many(
+			[b"access-1", b"access-2", b"expired", b"cookie", b"unknown"], token_type="oat")
+		self.assertEqual(sorted(result), [b"access-1", b"access-2"])
+		self.assertEqual(result[b"access-1"][SessionTokenField.SessionId], "access-1")
+		self.assertNotIn("_c", result[b"access-1"])
+
+		# All the tokens are validated in a single query
+		self.assertEqual(len(self.Collection.Queries), 1)
+		query_filter, _ = self.Collection.Queries[0]
+		self.assertEqual(len(query_filter["_id"]["$in"]), 5)
+
+	async def test_get_many_any_type(self):
+		result = await self.TokenService.get_many([b"access-1", b"cookie", b"cookie"])
+		self.assertEqual(sorted(result), [b"access-1", b"cookie"])
+
+	async def test_get_many_empty(self):
+		self.assertEqual(await self.TokenService.get_many([]), {})
+		self.assertEqual(len(self.Collection.Queries), 0)
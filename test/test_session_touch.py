@@ -0,0 +1,92 @@
+import datetime
+import types
+import unittest
+
+import bson
+
+import seacatauth.authz  # noqa: F401 (the session module cannot be imported first)
+from seacatauth.session.service import SessionService
+from seacatauth.generic import TTLCache
+
+
+class _Counter:
+
+	def add(self, name, value):
+		pass
+
+
+class _SessionCollection:
+
+	def __init__(self):
+		self.Fail = False
+		self.Writes = []
+		# Called while the bulk write is in progress
+		self.OnWrite = None
+
+	async def bulk_write(self, requests, ordered=True):
+		if self.OnWrite is not None:
+			self.OnWrite()
+		if self.Fail:
+			raise RuntimeError("Connection lost")
+		self.Writes.append(requests)
+		return types.SimpleNamespace(modified_count=len(requests))
+
+
+class SessionTouchFlushTestCase(unittest.IsolatedAsyncioTestCase):
+
+	def setUp(self):
+		self.Collection = _SessionCollection()
+		service = SessionService.__new__(SessionService)
+		service.StorageService = types.SimpleNamespace(Database={service.SessionCollection: self.Collection})
+		service.TouchCounter = _Counter()
+		service.PendingTouches = {}
+		service.LastTouchFlush = 0
+		service.Cache = TTLCache(max_size=10, expiration=60)
+		self.SessionService = service
+
+		self.Now = datetime.datetime.now(datetime.timezone.utc)
+		self.SessionA = bson.ObjectId()
+		self.SessionB = bson.ObjectId()
+		self.SessionC = bson.ObjectId()
+
+	async def test_flush(self):
+		self.SessionService._record_touch(self.SessionA, self.Now + datetime.timedelta(minutes=5), self.Now)
+		self.SessionService._record_touch(self.SessionA, self.Now + datetime.timedelta(minutes=1), self.Now)
+		self.SessionService._record_touch(self.SessionB, None, self.Now)
+		self.assertEqual(self.SessionService.PendingTouches[self.SessionA], self.Now + datetime.timedelta(minutes=5))
+
+		await self.SessionService._flush_touches()
+		self.assertEqual(len(self.Collection.Writes), 1)
+		self.assertEqual(len(self.Collection.Writes[0]), 2)
+		self.assertEqual(self.SessionService.PendingTouches, {})
+
+	async def test_failed_flush_is_retried(self):
+		self.SessionService._record_touch(self.SessionA, self.Now + datetime.timedelta(minutes=5), self.Now)
+		self.SessionService._record_touch(self.SessionB, self.Now + datetime.timedelta(minutes=5), self.Now)
+		self.SessionService._record_touch(self.SessionC, None, self.Now)
+		cached_session = {"_id": self.SessionA}
+		self.SessionService.Cache.set(self.SessionA, cached_session)
+
+		def touch_during_flush():
+			# Newer touches recorded while the write is in progress win, older ones do not
+			self.SessionService._record_touch(self.SessionA, self.Now + datetime.timedelta(minutes=10), self.Now)
+			self.SessionService._record_touch(self.SessionB, self.Now + datetime.timedelta(minutes=1), self.Now)
+
+		self.Collection.Fail = True
+		self.Collection.OnWrite = touch_during_flush
+		await self.SessionService._flush_touches()
+		self.assertEqual(self.SessionService.PendingTouches, {
+			self.SessionA: self.Now + datetime.timedelta(minutes=10),
+			self.SessionB: self.Now + datetime.timedelta(minutes=5),
+			self.SessionC: None,
+		})
+		# The cached session keeps the touch
+		self.assertIs(self.SessionService.Cache.get(self.SessionA), cached_session)
+
+		self.Collection.Fail = False
+		self.Collection.OnWrite = None
+		await self.SessionService._flush_touches()
+		self.assertEqual(len(self.Collection.Writes), 1)
+		self.assertEqual(len(self.Collection.Writes[0]), 3)
+		self.assertEqual(self.SessionService.PendingTouches, {})
+		self.assertIsNone(self.SessionService.Cache.get(self.SessionA))